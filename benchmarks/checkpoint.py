@@ -0,0 +1,112 @@
+from argparse import ArgumentParser
+import json
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from checkpoint import CheckpointWriter, loadCheckpoint
+from tpg import rng
+from tpg.trainer import Trainer
+
+"""
+Save/load time of the incremental checkpoint format against pickling the whole
+trainer, for a range of population sizes. Run from the repository root:
+
+	python -m benchmarks.checkpoint --version 1 --sizes 100 300 1000
+"""
+
+"""
+A trainer with random outcomes that has gone through one generation, so there is
+something to store both as a full snapshot and as a delta.
+"""
+def makeTrainer(version, teamPopSize, seed=0):
+	rng.seed(seed)
+	trainer = Trainer(range(10), teamPopSize, sourceRange=784, version=version)
+	for team in trainer.rootTeams:
+		team.outcomes['task'] = random.random()
+	return trainer
+
+def evolveRandom(trainer):
+	trainer.evolve()
+	for team in trainer.rootTeams:
+		team.outcomes['task'] = random.random()
+
+def timeIt(fn):
+	start = time.perf_counter()
+	result = fn()
+	return time.perf_counter() - start, result
+
+def directorySize(path):
+	if os.path.isfile(path):
+		return os.path.getsize(path)
+	return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+def benchmark(version, teamPopSize, directory):
+	trainer = makeTrainer(version, teamPopSize)
+	row = {'version': version, 'teamPopSize': teamPopSize,
+		'teams': len(trainer.teams), 'learners': len(trainer.learners)}
+
+	# everything in one pickle, what main.py used to do every generation
+	picklePath = os.path.join(directory, 'trainer.tpg')
+	def savePickle():
+		with open(picklePath, 'wb') as f:
+			pickle.dump({'trainer': trainer}, f)
+	def loadPickle():
+		with open(picklePath, 'rb') as f:
+			return pickle.load(f)
+	row['pickleSave'], _ = timeIt(savePickle)
+	row['pickleLoad'], _ = timeIt(loadPickle)
+	row['pickleBytes'] = directorySize(picklePath)
+
+	checkpointPath = os.path.join(directory, 'checkpoint')
+	writer = CheckpointWriter(checkpointPath)
+	row['fullSave'], _ = timeIt(lambda: writer.save(trainer))
+	row['fullBytes'] = directorySize(checkpointPath)
+
+	evolveRandom(trainer)
+	row['deltaSave'], _ = timeIt(lambda: writer.save(trainer))
+	row['deltaBytes'] = directorySize(checkpointPath) - row['fullBytes']
+	row['load'], _ = timeIt(lambda: loadCheckpoint(checkpointPath))
+
+	return row
+
+def main(args):
+	rows = []
+	directory = tempfile.mkdtemp()
+	try:
+		for size in args.sizes:
+			rows.append(benchmark(args.version, size, directory))
+			for fileName in os.listdir(directory):
+				path = os.path.join(directory, fileName)
+				if os.path.isdir(path):
+					shutil.rmtree(path)
+				else:
+					os.remove(path)
+	finally:
+		shutil.rmtree(directory)
+
+	if args.json:
+		print(json.dumps(rows, indent=1))
+		return
+
+	print('{:>6} {:>8} | {:>10} {:>10} {:>9} | {:>10} {:>10} {:>10} {:>9} {:>9}'.format(
+		'teams', 'learners', 'pickle s', 'pickle l', 'KB',
+		'full s', 'delta s', 'load', 'full KB', 'delta KB'))
+	for row in rows:
+		print('{:>6} {:>8} | {:>9.1f}ms {:>9.1f}ms {:>9.0f} | {:>9.1f}ms {:>9.1f}ms {:>9.1f}ms {:>9.0f} {:>9.0f}'.format(
+			row['teams'], row['learners'],
+			row['pickleSave']*1000, row['pickleLoad']*1000, row['pickleBytes']/1024,
+			row['fullSave']*1000, row['deltaSave']*1000, row['load']*1000,
+			row['fullBytes']/1024, row['deltaBytes']/1024))
+
+if __name__ == '__main__':
+	parser = ArgumentParser()
+	parser.add_argument('--version', type=int, default=1, help='Which version of the TPG to benchmark')
+	parser.add_argument('--sizes', type=int, nargs='+', default=[100, 300, 1000], help='Root team population sizes')
+	parser.add_argument('--json', action='store_true', help='Print the results as json')
+	main(parser.parse_args())
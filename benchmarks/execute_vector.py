@@ -0,0 +1,183 @@
+from argparse import ArgumentParser
+import json
+import math
+import time
+
+from numba import njit
+import numpy as np
+
+from tpg import rng
+from tpg.program import Program
+from tpg.utils import pad_array
+
+"""
+Speed of the version 3 Program.execute_vector against the previous implementation
+(kept below as executeVectorReference), which allocated a padded copy for every
+input read and a result vector for every instruction. Also checks both give the
+same bids and shared registers. Run from the repository root:
+
+	python -m benchmarks.execute_vector --lengths 8 32 128 --programs 200
+"""
+
+"""
+execute_vector as it was before working in place on preallocated registers.
+"""
+@njit
+def executeVectorReference(inpt, inptDims, numRegisters, modes, ops, dshrs, dsts, sshrs, srcs, shared, shareIndex, xShift, yMask):
+	vecs = np.zeros((numRegisters, numRegisters), dtype=np.float64)
+	vecNum = len(vecs)
+	vecSize = len(vecs[0])
+	shrRegSize = len(shared[0])
+	for i in range(len(modes)):
+		if modes[i] == 0:
+			src = vecs[srcs[i]%vecSize]
+		else:
+			srcX = (srcs[i] >> xShift) % inptDims[1]
+			srcY = (srcs[i] & yMask) % inptDims[0]
+			if sshrs[i] == 0:
+				src = pad_array(inpt[srcX,srcY:min(inptDims[1],srcY+vecSize)],vecSize)
+			else:
+				src = pad_array(inpt[srcX:min(inptDims[0],srcX+vecSize),srcY],vecSize)
+
+		op = ops[i]
+		y = src
+		if dshrs[i] == 0:
+			dest = dsts[i]%vecNum
+			x = vecs[dest]
+			if op == 0:
+				vecs[dest] = np.add(x,y)
+			elif op == 1:
+				vecs[dest] = np.subtract(x,y)
+			elif op == 2:
+				vecs[dest] = np.multiply(x,y)
+			elif op == 3:
+				vecs[dest] = np.divide(x,y)
+			elif op == 4:
+				vecs[dest] = np.multiply(x,-1)
+			elif op == 5:
+				vecs[dest] = np.exp(y)
+			elif op == 6:
+				vecs[dest] = np.cos(y)
+			else:
+				vecs[dest] = np.tanh(y)
+			for idx in range(len(vecs[dest])):
+				if math.isnan(vecs[dest][idx]):
+					vecs[dest][idx] = 0
+				elif vecs[dest][idx] == np.inf:
+					vecs[dest][idx] = np.finfo(np.float64).max
+				elif vecs[dest][idx] == -np.inf:
+					vecs[dest][idx] = np.finfo(np.float64).min
+		else:
+			dest = dsts[i]%shrRegSize
+			x = vecs[dest]
+			if op == 0:
+				shared[shareIndex][dest] = np.dot(x,y)
+			elif op == 1:
+				denom = np.linalg.norm(x) * np.linalg.norm(y)
+				if denom != 0:
+					shared[shareIndex][dest] = np.dot(x,y) / denom
+			elif op == 2:
+				shared[shareIndex][dest] = np.linalg.norm(np.subtract(x,y))
+			elif op == 3:
+				shared[shareIndex][dest] = np.argmax(y)
+			elif op == 4:
+				shared[shareIndex][dest] = np.argmin(y)
+			elif op == 5:
+				shared[shareIndex][dest] = np.mean(y)
+			elif op == 6:
+				shared[shareIndex][dest] = np.min(y)
+			elif op == 7:
+				shared[shareIndex][dest] = np.max(y)
+			if math.isnan(shared[shareIndex][dest]):
+				shared[shareIndex][dest] = 0
+			elif shared[shareIndex][dest] == np.inf:
+				shared[shareIndex][dest] = np.finfo(np.float64).max
+			elif shared[shareIndex][dest] == -np.inf:
+				shared[shareIndex][dest] = np.finfo(np.float64).min
+	return vecs[0][0]
+
+"""
+Sets up Program for inputs of shape sourceDims like the Trainer does for version 3.
+"""
+def configure(sourceDims):
+	Program.version = 3
+	Program.sourceRange = sourceDims[0] * sourceDims[1]
+	Program.sourceDims = sourceDims
+	bitsNeeded = len(format(Program.sourceRange, 'b'))
+	Program.xShift = int(bitsNeeded/2.0)
+	Program.yMask = (2**(bitsNeeded - Program.xShift)) - 1
+
+def makePrograms(length, count, seed=0):
+	rng.seed(seed)
+	return [Program(maxProgramLength=length).instructions for _ in range(count)]
+
+def runAll(execute, programs, images, numRegisters, workspace):
+	shared = np.zeros((8, 8))
+	bids = []
+	for inpt in images:
+		for instructions in programs:
+			args = (instructions[:,0], instructions[:,1], instructions[:,2],
+				instructions[:,3], instructions[:,4], instructions[:,5],
+				shared, 0, Program.xShift, Program.yMask)
+			if workspace:
+				vecs, src = Program.vectorWorkspace(numRegisters)
+				bids.append(execute(inpt, Program.sourceDims, vecs, src, *args, Program.clamps))
+			else:
+				bids.append(execute(inpt, Program.sourceDims, numRegisters, *args))
+	return np.array(bids), shared
+
+def timeIt(fn, repeats):
+	best = None
+	for _ in range(repeats):
+		start = time.perf_counter()
+		result = fn()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return best, result
+
+def benchmark(length, numPrograms, numImages, numRegisters, repeats):
+	programs = makePrograms(length, numPrograms)
+	imageRng = np.random.RandomState(0)
+	images = [imageRng.randint(0, 256, Program.sourceDims).astype(np.uint8)
+		for _ in range(numImages)]
+	executions = numPrograms * numImages
+
+	reference = lambda: runAll(executeVectorReference, programs, images, numRegisters, False)
+	current = lambda: runAll(Program.execute_vector, programs, images, numRegisters, True)
+	reference(), current() # compile
+
+	referenceTime, (referenceBids, referenceShared) = timeIt(reference, repeats)
+	currentTime, (currentBids, currentShared) = timeIt(current, repeats)
+
+	return {'length': length, 'executions': executions,
+		'referenceUs': referenceTime / executions * 1e6,
+		'currentUs': currentTime / executions * 1e6,
+		'speedup': referenceTime / currentTime,
+		'bidsMatch': bool(np.allclose(referenceBids, currentBids, rtol=1e-9)),
+		'sharedMatch': bool(np.allclose(referenceShared, currentShared, rtol=1e-9))}
+
+def main(args):
+	configure((28, 28))
+	rows = [benchmark(length, args.programs, args.images, args.registers, args.repeats)
+		for length in args.lengths]
+
+	if args.json:
+		print(json.dumps(rows, indent=1))
+		return
+
+	print('{:>7} {:>11} | {:>12} {:>12} {:>8} | {:>5}'.format(
+		'length', 'executions', 'reference', 'current', 'speedup', 'match'))
+	for row in rows:
+		print('{:>7} {:>11} | {:>10.2f}us {:>10.2f}us {:>7.1f}x | {:>5}'.format(
+			row['length'], row['executions'], row['referenceUs'], row['currentUs'],
+			row['speedup'], 'yes' if row['bidsMatch'] and row['sharedMatch'] else 'NO'))
+
+if __name__ == '__main__':
+	parser = ArgumentParser()
+	parser.add_argument('--lengths', type=int, nargs='+', default=[8, 32, 128], help='Maximum program lengths')
+	parser.add_argument('--programs', type=int, default=200, help='Random programs per length')
+	parser.add_argument('--images', type=int, default=20, help='Random inputs each program runs on')
+	parser.add_argument('--registers', type=int, default=8, help='Number of vector registers')
+	parser.add_argument('--repeats', type=int, default=3, help='Timing repeats, the best is kept')
+	parser.add_argument('--json', action='store_true', help='Print the results as json')
+	main(parser.parse_args())
@@ -0,0 +1,137 @@
+from argparse import ArgumentParser
+import json
+import time
+
+import numpy as np
+
+from tpg import rng
+from tpg.program import Program
+from tpg.rng import stream
+from tpg.utils import flip
+
+"""
+Mutations per second of Program.mutateInstructions against the previous
+implementation (kept below as mutateInstructionsReference), which reallocated
+the whole instruction matrix with np.delete/np.insert on every deletion and
+insertion. Each run copies a parent program and mutates the copy a few times,
+like Team.mutate does, and both implementations make the same random choices
+so they must end with the same instructions. Run from the repository root:
+
+	python -m benchmarks.mutate --lengths 8 32 128 --programs 500
+"""
+
+"""
+mutateInstructions as it was before the instructions got spare capacity (with
+its random numbers from the stream, like the current one).
+"""
+def mutateInstructionsReference(instructions, pDel, pAdd, pSwp, pMut):
+	instructions = np.array(instructions)
+	changed = False
+
+	while not changed:
+		if len(instructions) > 1 and flip(pDel):
+			instructions = np.delete(instructions,
+								stream.randint(0, len(instructions)-1), 0)
+			changed = True
+
+		if flip(pMut):
+			idx1 = stream.randint(0, len(instructions)-1)
+			ranges = Program.instructionRanges()
+			idx2 = stream.randint(0, len(ranges)-1)
+			instructions[idx1, idx2] = stream.randint(0, ranges[idx2])
+			changed = True
+
+		if len(instructions) > 1 and flip(pSwp):
+			idx1, idx2 = stream.pair(len(instructions))
+			tmp = np.array(instructions[idx1])
+			instructions[idx1] = np.array(instructions[idx2])
+			instructions[idx2] = tmp
+			changed = True
+
+		if flip(pAdd):
+			instructions = np.insert(instructions,
+					stream.randint(0, len(instructions)),
+					Program.randomInstruction(), 0)
+			changed = True
+
+	return instructions
+
+def runReference(parents, mutations, probs, seed):
+	rng.seed(seed)
+	children = []
+	for parent in parents:
+		instructions = parent.instructions
+		for _ in range(mutations):
+			instructions = mutateInstructionsReference(instructions, *probs)
+		children.append(instructions)
+	return children
+
+def runCurrent(parents, mutations, probs, seed):
+	rng.seed(seed)
+	children = []
+	for parent in parents:
+		child = parent.copy()
+		for _ in range(mutations):
+			child.mutateInstructions(*probs)
+		children.append(child.instructions)
+	return children
+
+def timeIt(fn, repeats):
+	best = None
+	for _ in range(repeats):
+		start = time.perf_counter()
+		result = fn()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return best, result
+
+def benchmark(length, numPrograms, mutations, probs, repeats, seed):
+	rng.seed(seed)
+	parents = [Program(maxProgramLength=length) for _ in range(numPrograms)]
+	total = numPrograms * mutations
+
+	reference = lambda: runReference(parents, mutations, probs, seed)
+	current = lambda: runCurrent(parents, mutations, probs, seed)
+	reference(), current() # compile
+
+	referenceTime, referenceChildren = timeIt(reference, repeats)
+	currentTime, currentChildren = timeIt(current, repeats)
+
+	return {'length': length, 'mutations': total,
+		'referencePerSec': total / referenceTime,
+		'currentPerSec': total / currentTime,
+		'speedup': referenceTime / currentTime,
+		'match': all(np.array_equal(ref, cur)
+			for ref, cur in zip(referenceChildren, currentChildren))}
+
+def main(args):
+	Program.version = args.version
+	probs = (args.pDel, args.pAdd, args.pSwp, args.pMut)
+	rows = [benchmark(length, args.programs, args.mutations, probs, args.repeats, args.seed)
+		for length in args.lengths]
+
+	if args.json:
+		print(json.dumps(rows, indent=1))
+		return
+
+	print('{:>7} {:>10} | {:>12} {:>12} {:>8} | {:>5}'.format(
+		'length', 'mutations', 'reference/s', 'current/s', 'speedup', 'match'))
+	for row in rows:
+		print('{:>7} {:>10} | {:>12.0f} {:>12.0f} {:>7.1f}x | {:>5}'.format(
+			row['length'], row['mutations'], row['referencePerSec'], row['currentPerSec'],
+			row['speedup'], 'yes' if row['match'] else 'NO'))
+
+if __name__ == '__main__':
+	parser = ArgumentParser()
+	parser.add_argument('--lengths', type=int, nargs='+', default=[8, 32, 128], help='Maximum program lengths')
+	parser.add_argument('--programs', type=int, default=500, help='Random parent programs per length')
+	parser.add_argument('--mutations', type=int, default=4, help='mutateInstructions calls per child')
+	parser.add_argument('--version', type=int, default=2, help='TPG version of the instructions')
+	parser.add_argument('--pDel', type=float, default=0.5, help='Instruction deletion probability')
+	parser.add_argument('--pAdd', type=float, default=0.5, help='Instruction insertion probability')
+	parser.add_argument('--pSwp', type=float, default=1.0, help='Instruction swap probability')
+	parser.add_argument('--pMut', type=float, default=1.0, help='Instruction change probability')
+	parser.add_argument('--repeats', type=int, default=3, help='Timing repeats, the best is kept')
+	parser.add_argument('--seed', type=int, default=0, help='Seed for the programs and mutations')
+	parser.add_argument('--json', action='store_true', help='Print the results as json')
+	main(parser.parse_args())
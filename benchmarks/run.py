@@ -0,0 +1,231 @@
+from argparse import ArgumentParser
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from checkpoint import CheckpointWriter, loadCheckpoint
+from tpg import rng
+from tpg.agent import Agent
+from tpg.backends import getBackend
+from tpg.program import Program
+from tpg.trainer import Trainer
+
+"""
+Times the hot paths of TPG for each version and population size, with fixed
+seeds so runs on the same machine are comparable:
+
+	initMs      Trainer creation, the random initial population
+	executeNs   Program.execute_* per instruction, the kernel call alone
+	bidUs       Learner.bid per call (observation, registers and the kernel)
+	actUs       Agent.act per sample (Team.act through the graph)
+	evolveMs    Trainer.evolve per generation, on random outcomes
+	saveMs      full checkpoint save, deltaMs a save after one generation
+	loadMs      checkpoint load
+
+Run from the repository root, --output writes the results as json and
+--baseline compares against an earlier output, exiting with 1 if any time got
+slower than the tolerance:
+
+	python -m benchmarks.run --versions 1 2 3 4 5 --sizes 50 200 --output bench.json
+	python -m benchmarks.run --baseline bench.json --tolerance 0.2
+"""
+
+# timings compared against a baseline, all lower is better
+Metrics = ('initMs', 'executeNs', 'bidUs', 'actUs', 'evolveMs', 'saveMs', 'deltaMs', 'loadMs')
+
+def seedAll(seed):
+	rng.seed(seed)
+
+def timeIt(fn, repeats):
+	best = None
+	for _ in range(repeats):
+		start = time.perf_counter()
+		fn()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return best
+
+"""
+A call running the learner's program on the state with the Program kernel its
+version uses, with everything else (columns, observation, registers) prepared
+beforehand.
+"""
+def kernelCall(learner, state, memory):
+	ins = learner.program.instructions
+	cols = tuple(np.ascontiguousarray(ins[:,i]) for i in range(ins.shape[1]))
+	if Program.version == 1:
+		regs = np.zeros(len(learner.registers))
+		return lambda: Program.execute_scalar(state, regs, *cols, Program.clamps)
+	if Program.version == 3:
+		if learner.mode == 1:
+			vecs, src = Program.vectorWorkspace(learner.numRegisters)
+			return lambda: Program.execute_vector(state, Program.sourceDims, vecs, src, *cols,
+					memory, learner.shareIndex, Program.xShift, Program.yMask, Program.clamps)
+		if learner.mode == 2:
+			mats, src, tmp = Program.matrixWorkspace(learner.numRegisters)
+			return lambda: Program.execute_matrix(state, Program.sourceDims, mats, src, tmp, *cols,
+					memory, learner.shareIndex, Program.xShift, Program.yMask, Program.clamps)
+		inpt = state
+		regs = np.zeros(learner.numRegisters, dtype=np.float32)
+	else:
+		inpt = getBackend().observation(learner, state)
+		regs = np.zeros(len(learner.registers))
+	return lambda: Program.execute_shared(inpt, regs, *cols, memory, learner.shareIndex, Program.clamps)
+
+def randomOutcomes(trainer):
+	for team in trainer.rootTeams:
+		team.outcomes['task'] = random.random()
+
+def benchmarkExecute(trainer, images, repeats):
+	memory = Agent.newMemory()
+	calls = [kernelCall(lrnr, image, memory)
+			for lrnr in trainer.learners for image in images]
+	instructions = sum(len(lrnr.program.instructions) for lrnr in trainer.learners) * len(images)
+	runAll = lambda: [call() for call in calls]
+	runAll() # compile
+	return timeIt(runAll, repeats) / instructions * 1e9
+
+def benchmarkBid(trainer, images, repeats):
+	memory = Agent.newMemory()
+	runAll = lambda: [lrnr.bid(image, memory) for lrnr in trainer.learners for image in images]
+	runAll()
+	return timeIt(runAll, repeats) / (len(trainer.learners) * len(images)) * 1e6
+
+def benchmarkAct(trainer, images, repeats):
+	agents = trainer.getAgents()
+	def runAll():
+		for agent in agents:
+			for image in images:
+				agent.reset()
+				agent.act(image)
+	runAll()
+	return timeIt(runAll, repeats) / (len(agents) * len(images)) * 1e6
+
+"""
+Mean time of a generation over generations, scoring the root teams randomly,
+after an untimed one to compile the mutation kernels.
+"""
+def benchmarkEvolve(trainer, generations):
+	randomOutcomes(trainer)
+	trainer.evolve()
+	total = 0
+	for _ in range(generations):
+		randomOutcomes(trainer)
+		start = time.perf_counter()
+		trainer.evolve()
+		total += time.perf_counter() - start
+	return total / generations * 1e3
+
+def benchmarkCheckpoint(trainer, repeats):
+	directory = tempfile.mkdtemp()
+	try:
+		path = os.path.join(directory, 'checkpoint')
+		def saveFull():
+			shutil.rmtree(path, ignore_errors=True)
+			CheckpointWriter(path).save(trainer)
+		save = timeIt(saveFull, repeats)
+
+		writer = CheckpointWriter(path)
+		writer.save(trainer) # full, the first save of a checkpoint
+		randomOutcomes(trainer)
+		trainer.evolve()
+		delta = timeIt(lambda: writer.save(trainer), 1)
+		load = timeIt(lambda: loadCheckpoint(path), repeats)
+	finally:
+		shutil.rmtree(directory)
+	return save * 1e3, delta * 1e3, load * 1e3
+
+def benchmark(version, teamPopSize, args):
+	seedAll(args.seed)
+	start = time.perf_counter()
+	trainer = Trainer(range(10), teamPopSize, sourceRange=784, sourceDims=(28,28), version=version)
+	initMs = (time.perf_counter() - start) * 1e3
+	images = np.random.randint(0, 256, (args.samples, 28, 28)).astype(np.uint8)
+
+	row = {'version': version, 'teamPopSize': teamPopSize,
+		'teams': len(trainer.teams), 'learners': len(trainer.learners),
+		'instructions': int(np.mean([len(lrnr.program.instructions) for lrnr in trainer.learners])),
+		'initMs': initMs}
+	row['executeNs'] = benchmarkExecute(trainer, images, args.repeats)
+	row['bidUs'] = benchmarkBid(trainer, images, args.repeats)
+	row['actUs'] = benchmarkAct(trainer, images, args.repeats)
+	row['evolveMs'] = benchmarkEvolve(trainer, args.generations)
+	row['saveMs'], row['deltaMs'], row['loadMs'] = benchmarkCheckpoint(trainer, args.repeats)
+	return row
+
+def machineInfo():
+	import numba
+	return {'python': platform.python_version(), 'numpy': np.__version__,
+		'numba': numba.__version__, 'machine': platform.machine(),
+		'processor': platform.processor(), 'system': platform.system(),
+		'jit': os.environ.get('NUMBA_DISABLE_JIT', '0') != '1'}
+
+"""
+Rows of the results slower than the baseline by more than tolerance (a
+fraction), as (version, teamPopSize, metric, baseline, current).
+"""
+def regressions(results, baseline, tolerance):
+	baseRows = {(row['version'], row['teamPopSize']): row for row in baseline['results']}
+	slower = []
+	for row in results['results']:
+		baseRow = baseRows.get((row['version'], row['teamPopSize']))
+		if baseRow is None:
+			continue
+		for metric in Metrics:
+			if metric in baseRow and row[metric] > baseRow[metric] * (1 + tolerance):
+				slower.append((row['version'], row['teamPopSize'], metric, baseRow[metric], row[metric]))
+	return slower
+
+def printTable(rows):
+	print('{:>3} {:>5} {:>6} {:>8} | {:>7} {:>9} {:>8} {:>8} {:>9} | {:>8} {:>8} {:>8}'.format(
+		'v', 'size', 'teams', 'learners', 'init ms', 'exec ns', 'bid us', 'act us', 'evolve ms',
+		'save ms', 'delta ms', 'load ms'))
+	for row in rows:
+		print('{:>3} {:>5} {:>6} {:>8} | {:>7.1f} {:>9.1f} {:>8.2f} {:>8.1f} {:>9.1f} | {:>8.1f} {:>8.1f} {:>8.1f}'.format(
+			row['version'], row['teamPopSize'], row['teams'], row['learners'],
+			row['initMs'], row['executeNs'], row['bidUs'], row['actUs'], row['evolveMs'],
+			row['saveMs'], row['deltaMs'], row['loadMs']))
+
+def main(args):
+	results = {'machine': machineInfo(), 'seed': args.seed, 'samples': args.samples,
+		'generations': args.generations, 'repeats': args.repeats,
+		'results': [benchmark(version, size, args)
+			for version in args.versions for size in args.sizes]}
+
+	if args.output is not None:
+		with open(args.output, 'w') as f:
+			json.dump(results, f, indent=1)
+	if args.json:
+		print(json.dumps(results, indent=1))
+	else:
+		printTable(results['results'])
+
+	if args.baseline is not None:
+		with open(args.baseline, 'r') as f:
+			baseline = json.load(f)
+		slower = regressions(results, baseline, args.tolerance)
+		for version, size, metric, before, after in slower:
+			print('Regression v{} size {}: {} {:.2f} -> {:.2f}'.format(version, size, metric, before, after))
+		if len(slower) > 0:
+			sys.exit(1)
+
+if __name__ == '__main__':
+	parser = ArgumentParser()
+	parser.add_argument('--versions', type=int, nargs='+', default=[1, 2, 3, 4, 5], help='TPG versions to benchmark')
+	parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200], help='Root team population sizes')
+	parser.add_argument('--samples', type=int, default=20, help='Random inputs per learner/agent')
+	parser.add_argument('--generations', type=int, default=3, help='Generations timed for evolve')
+	parser.add_argument('--repeats', type=int, default=3, help='Timing repeats, the best is kept')
+	parser.add_argument('--seed', type=int, default=0, help='Seed for the population and inputs')
+	parser.add_argument('--output', default=None, help='Write the results as json to this file')
+	parser.add_argument('--json', action='store_true', help='Print the results as json')
+	parser.add_argument('--baseline', default=None, help='Results json to compare against')
+	parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown against the baseline, as a fraction')
+	main(parser.parse_args())
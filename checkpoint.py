@@ -0,0 +1,586 @@
+import atexit
+from importlib import import_module
+import io
+import json
+import os
+import pickle
+import queue
+import re
+import threading
+
+import numpy as np
+
+"""
+Incremental checkpoints for a Trainer. Instead of pickling the whole object graph
+every generation, the population is stored as columnar arrays (one instruction
+buffer, a learner table and a team table) in a directory of segment files:
+
+	checkpoint_v1/
+		MANIFEST          json list of the segments to replay, replaced atomically
+		seg_000000.npz    full snapshot
+		seg_000001.npz    learners/teams created since the previous segment, ids
+		                  of the ones deleted, and the small per-generation state
+		...
+
+Each save only writes the learners and teams that are new since the last save, so
+the cost is proportional to the number of children per generation rather than the
+population size. Every file is written to a temporary name, fsynced and renamed,
+and the manifest is the commit point, so a crash mid-save leaves the previous
+checkpoint intact. When the deltas grow larger than the last full snapshot (or
+there are too many of them) the next save writes a fresh snapshot instead.
+
+Deltas only pay off when little of the population changes between saves, e.g.
+saving every few evolve calls. main.py saves once per generation, after about 60
+evolve calls, by then nearly every learner and team is new, a delta is about the
+size of a snapshot, and the checkpoint is mostly full snapshots (every other or
+third save).
+
+The header also holds the state of the random stream (tpg.rng), a resumed run
+draws the same random numbers as one that was never stopped.
+
+Learner.states (the mutation uniqueness archive) is not stored, it is rebuilt
+while training.
+"""
+
+FormatVersion = 1
+ManifestName = 'MANIFEST'
+# files the writer removes once unused, segments and the temporary files of
+# writeAtomic, anything else in the directory is left alone
+SegmentPattern = re.compile(r'seg_\d{6}\.npz(\.tmp)?|' + ManifestName + r'\.tmp')
+
+# Trainer attributes holding the population, stored in the tables not the header
+PopulationAttributes = ('teams', 'rootTeams', 'rootSet', 'newTeams', 'learners', 'elites')
+
+# Optional per-learner attributes of the different TPG versions, stored as columns
+LearnerExtras = ('shareIndex', 'mode', 'numRegisters', 'obsSrc', 'obsSrcs')
+
+# Learner attributes that can change after the learner was first stored, written
+# for every live learner on each save, only for versions whose registers persist
+# between bids (backend persistentRegisters), the others get fresh ones on load.
+# Older checkpoints also have obsSrcs (v5), which mutation used to shift in
+# place, it is now replaced (copy on write), and registers of every version.
+LearnerState = ('registers',)
+LegacyLearnerState = ('obsSrcs',)
+
+# Class attributes that belong to this process rather than to the population
+# (counters and tools of the run), neither saved nor given to worker processes
+ProcessState = {'Program': ('clamps', 'profiler')}
+
+# learner action kinds
+ActionAtomic = 0
+ActionTeam = 1
+ActionMulti = 2
+
+"""
+The classes of the TPG package a trainer belongs to (e.g. 'tpg').
+"""
+def getClasses(package):
+	return {
+		'Trainer': import_module(package + '.trainer').Trainer,
+		'Team': import_module(package + '.team').Team,
+		'Learner': import_module(package + '.learner').Learner,
+		'Program': import_module(package + '.program').Program,
+		'Agent': import_module(package + '.agent').Agent,
+	}
+
+"""
+Class level configuration (id counters, instruction ranges, shared register
+sizes, ...) which is otherwise lost between runs.
+"""
+def getClassState(classes):
+	classState = {}
+	for name, cls in classes.items():
+		if name == 'Trainer':
+			continue
+		skip = ProcessState.get(name, ())
+		classState[name] = {k: v for k, v in vars(cls).items()
+				if not k.startswith('__') and not callable(v) and k not in skip
+					and not isinstance(v, (staticmethod, classmethod, property))}
+
+	return classState
+
+def setClassState(classes, classState):
+	for name, values in classState.items():
+		skip = ProcessState.get(name, ()) # saved by older checkpoints
+		for k, v in values.items():
+			if k not in skip:
+				setattr(classes[name], k, v)
+
+"""
+The package and Program.version of a package name from a checkpoint, older
+checkpoints name one of the per-version packages (e.g. 'tpg_v3') which are now
+all the 'tpg' package. Version is None for a current package name.
+"""
+def legacyPackage(package):
+	if package.startswith('tpg_v'):
+		return 'tpg', int(package[len('tpg_v'):])
+	return package, None
+
+"""
+Unpickler for the single pickle checkpoints of older runs, which reference the
+per-version packages.
+"""
+class LegacyUnpickler(pickle.Unpickler):
+
+	version = None
+
+	def find_class(self, module, name):
+		package, version = legacyPackage(module.split('.')[0])
+		if version is not None:
+			LegacyUnpickler.version = version
+			module = package + module[module.index('.'):] if '.' in module else package
+		return super().find_class(module, name)
+
+"""
+Loads an older single pickle checkpoint, setting Program.version to the version
+of the package it was saved from.
+"""
+def loadPickle(path):
+	LegacyUnpickler.version = None
+	with open(path, 'rb') as f:
+		data = LegacyUnpickler(f).load()
+	if LegacyUnpickler.version is not None:
+		import_module('tpg.program').Program.version = LegacyUnpickler.version
+	return data
+
+"""
+Writes to a temporary file next to path, fsyncs it and renames it over path.
+"""
+def writeAtomic(path, data):
+	tmpPath = path + '.tmp'
+	with open(tmpPath, 'wb') as f:
+		f.write(data)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(tmpPath, path)
+
+def readManifest(path):
+	manifestPath = os.path.join(path, ManifestName)
+	if not os.path.exists(manifestPath):
+		return None
+	with open(manifestPath, 'r') as f:
+		return json.load(f)
+
+"""
+Encodes the given learners and teams into columnar arrays.
+"""
+def encodeTables(learners, teams):
+	arrays = {}
+
+	# learner table and the concatenated instruction buffer
+	programs = [lrnr.program.instructions for lrnr in learners]
+	lengths = np.array([len(ins) for ins in programs], dtype=np.int64)
+	arrays['learnerId'] = np.array([lrnr.id for lrnr in learners], dtype=np.int64)
+	arrays['programId'] = np.array([lrnr.program.id for lrnr in learners], dtype=np.int64)
+	arrays['programOffsets'] = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+	if len(programs) > 0:
+		arrays['instructions'] = np.concatenate(programs).astype(np.int32)
+
+	actionKind = np.zeros(len(learners), dtype=np.int8)
+	actionValue = np.zeros(len(learners), dtype=np.int64)
+	multiActions = []
+	for i, lrnr in enumerate(learners):
+		if isinstance(lrnr.action, list):
+			actionKind[i] = ActionMulti
+			actionValue[i] = len(multiActions)
+			multiActions.append(lrnr.action)
+		elif lrnr.isActionAtomic():
+			actionKind[i] = ActionAtomic
+			actionValue[i] = lrnr.action
+		else:
+			actionKind[i] = ActionTeam
+			actionValue[i] = lrnr.action.id
+	arrays['actionKind'] = actionKind
+	arrays['actionValue'] = actionValue
+	if len(multiActions) > 0:
+		arrays['multiActions'] = np.array(multiActions, dtype=np.float64)
+
+	for name in LearnerExtras:
+		if len(learners) > 0 and hasattr(learners[0], name):
+			arrays['learner_' + name] = np.array([getattr(lrnr, name) for lrnr in learners])
+
+	# team table, learner membership stored as offsets into a flat id list
+	arrays['teamId'] = np.array([team.id for team in teams], dtype=np.int64)
+	arrays['teamLearnerOffsets'] = np.concatenate(
+		([0], np.cumsum([len(team.learners) for team in teams]))).astype(np.int64)
+	arrays['teamLearnerIds'] = np.array(
+		[lrnr.id for team in teams for lrnr in team.learners], dtype=np.int64)
+
+	return arrays
+
+"""
+Encodes the state that changes every generation for already stored objects:
+outcomes and fitness of every team and the learnerState (LearnerState or none)
+of every learner.
+"""
+def encodeState(learners, teams, learnerState):
+	arrays = {}
+	tasks = sorted({task for team in teams for task in team.outcomes})
+	outcomes = np.full((len(teams), len(tasks)), np.nan)
+	fitness = np.full(len(teams), np.nan)
+	for i, team in enumerate(teams):
+		for j, task in enumerate(tasks):
+			if task in team.outcomes:
+				outcomes[i, j] = team.outcomes[task]
+		if team.fitness is not None:
+			fitness[i] = team.fitness
+	arrays['outcomes'] = outcomes
+	arrays['fitness'] = fitness
+
+	for name in learnerState:
+		if len(learners) > 0 and hasattr(learners[0], name):
+			arrays['state_' + name] = np.array([getattr(lrnr, name) for lrnr in learners])
+
+	return arrays, tasks
+
+"""
+Saves a trainer generation by generation into a checkpoint directory. Keep one
+writer per run, it remembers what has already been written.
+"""
+class CheckpointWriter:
+
+	def __init__(self, path, maxSegments=20):
+		self.path = path
+		self.maxSegments = maxSegments
+		self.manifest = None # as last committed
+		self.package = None # package of the last prepared segment
+		self.numSegments = 0 # segments in the chain including prepared ones
+		self.savedLearners = None # ids stored in the checkpoint so far
+		self.savedTeams = None
+
+	"""
+	Reads what is already in the checkpoint on disk, so a resumed run keeps
+	appending to it.
+	"""
+	def loadExisting(self):
+		self.manifest = readManifest(self.path)
+		self.savedLearners = set()
+		self.savedTeams = set()
+		if self.manifest is None or len(self.manifest['segments']) == 0:
+			return
+		self.package = self.manifest['package']
+		self.numSegments = len(self.manifest['segments'])
+		with np.load(os.path.join(self.path, self.manifest['segments'][-1])) as seg:
+			self.savedLearners = set(seg['liveLearners'].tolist())
+			self.savedTeams = set(seg['teamOrder'].tolist())
+
+	"""
+	Builds the arrays of the next segment, only learners and teams not in the
+	checkpoint yet unless full. Returns (arrays, live learner ids, live team ids).
+	The arrays are fresh copies, nothing in them references the population.
+	"""
+	def snapshot(self, trainer, full=False, **extra):
+		# learners held by teams but not (yet) in the population are stored too
+		learners = list(trainer.learners)
+		inPopulation = {lrnr.id for lrnr in learners}
+		for team in trainer.teams:
+			for lrnr in team.learners:
+				if lrnr.id not in inPopulation:
+					inPopulation.add(lrnr.id)
+					learners.append(lrnr)
+		teams = list(trainer.teams)
+
+		liveLearners = [lrnr.id for lrnr in learners]
+		liveTeams = [team.id for team in teams]
+		if full:
+			newLearners = learners
+			newTeams = teams
+			removedLearners = []
+			removedTeams = []
+		else:
+			newLearners = [lrnr for lrnr in learners if lrnr.id not in self.savedLearners]
+			newTeams = [team for team in teams if team.id not in self.savedTeams]
+			removedLearners = list(self.savedLearners.difference(liveLearners))
+			removedTeams = list(self.savedTeams.difference(liveTeams))
+
+		package = type(trainer).__module__.split('.')[0]
+		backend = import_module(package + '.backends').getBackend()
+		arrays = encodeTables(newLearners, newTeams)
+		state, tasks = encodeState(learners, teams,
+				LearnerState if backend.persistentRegisters else ())
+		arrays.update(state)
+
+		arrays['full'] = np.array(full)
+		arrays['removedLearners'] = np.array(removedLearners, dtype=np.int64)
+		arrays['removedTeams'] = np.array(removedTeams, dtype=np.int64)
+		arrays['liveLearners'] = np.array(liveLearners, dtype=np.int64)
+		arrays['populationSize'] = np.array(len(trainer.learners))
+		arrays['teamOrder'] = np.array(liveTeams, dtype=np.int64)
+		arrays['rootTeams'] = np.array([team.id for team in trainer.rootTeams], dtype=np.int64)
+		arrays['elites'] = np.array([team.id for team in trainer.elites], dtype=np.int64)
+
+		classes = getClasses(package)
+		header = {
+			'trainer': {k: v for k, v in trainer.__getstate__().items()
+					if k not in PopulationAttributes},
+			'classState': getClassState(classes),
+			'randomState': import_module(package + '.rng').stream.getstate(),
+			'tasks': tasks,
+			'extra': extra,
+		}
+		arrays['header'] = np.frombuffer(pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+		for arr in arrays.values():
+			arr.flags.writeable = False
+
+		return arrays, liveLearners, liveTeams
+
+	"""
+	Whether the next save should be a full snapshot rather than a delta.
+	"""
+	def needsFull(self, package):
+		return (self.package != package
+			or self.numSegments >= self.maxSegments
+			or (self.manifest is not None
+				and self.manifest['deltaBytes'] > self.manifest['baseBytes']))
+
+	"""
+	Snapshots the trainer into the next segment to commit, on the calling thread.
+	Returns (arrays, package, full) for commit.
+	"""
+	def prepare(self, trainer, **extra):
+		if self.savedLearners is None:
+			self.loadExisting()
+
+		package = type(trainer).__module__.split('.')[0]
+		full = self.needsFull(package)
+		arrays, liveLearners, liveTeams = self.snapshot(trainer, full=full, **extra)
+
+		self.package = package
+		self.numSegments = 1 if full else self.numSegments + 1
+		self.savedLearners = set(liveLearners)
+		self.savedTeams = set(liveTeams)
+
+		return arrays, package, full
+
+	"""
+	Writes arrays as the next segment and commits it in the manifest. Segments
+	must be committed in the order they were prepared.
+	"""
+	def commit(self, arrays, package, full):
+		os.makedirs(self.path, exist_ok=True)
+		manifest = self.manifest
+
+		buffer = io.BytesIO()
+		np.savez(buffer, **arrays)
+		data = buffer.getvalue()
+
+		segmentNum = 0 if manifest is None else manifest['nextSegment']
+		segmentName = 'seg_{:06d}.npz'.format(segmentNum)
+		writeAtomic(os.path.join(self.path, segmentName), data)
+
+		if full:
+			newManifest = {'format': FormatVersion, 'package': package,
+				'segments': [segmentName], 'nextSegment': segmentNum + 1,
+				'baseBytes': len(data), 'deltaBytes': 0}
+		else:
+			newManifest = dict(manifest)
+			newManifest['segments'] = manifest['segments'] + [segmentName]
+			newManifest['nextSegment'] = segmentNum + 1
+			newManifest['deltaBytes'] = manifest['deltaBytes'] + len(data)
+		writeAtomic(os.path.join(self.path, ManifestName),
+					json.dumps(newManifest, indent=1).encode('utf-8'))
+		self.manifest = newManifest
+
+		# segments no longer referenced (or left over from a crash) go away
+		keep = set(newManifest['segments'])
+		for fileName in os.listdir(self.path):
+			if SegmentPattern.fullmatch(fileName) and fileName not in keep:
+				os.remove(os.path.join(self.path, fileName))
+
+	"""
+	Saves the trainer, extra keyword values (e.g. gen, results) are stored with it
+	and returned by loadCheckpoint.
+	"""
+	def save(self, trainer, **extra):
+		self.commit(*self.prepare(trainer, **extra))
+
+	def flush(self):
+		pass
+
+	def close(self):
+		pass
+
+"""
+CheckpointWriter that writes on a background thread. save only snapshots the
+trainer into read only arrays and queues them, so training carries on while the
+segment is written. At most maxPending snapshots wait to be written, save blocks
+when the queue is full. Pending snapshots are written by flush/close, and at
+interpreter exit at the latest. Write errors are raised by the next save, flush
+or close.
+"""
+class AsyncCheckpointWriter(CheckpointWriter):
+
+	def __init__(self, path, maxSegments=20, maxPending=2):
+		super().__init__(path, maxSegments=maxSegments)
+		self.queue = queue.Queue(maxsize=maxPending)
+		self.error = None
+		self.failed = False # skip deltas after a failure until the next snapshot
+		self.thread = threading.Thread(target=self.run, name='checkpoint-writer', daemon=True)
+		self.thread.start()
+		atexit.register(self.close)
+
+	def run(self):
+		while True:
+			item = self.queue.get()
+			try:
+				if item is None:
+					return
+				if item[2]:
+					self.failed = False
+				if not self.failed:
+					self.commit(*item)
+			except BaseException as e:
+				self.failed = True
+				self.error = e
+			finally:
+				self.queue.task_done()
+
+	def raiseError(self):
+		if self.error is not None:
+			error = self.error
+			self.error = None
+			# the chain on disk stops at the failed segment, start over from a snapshot
+			self.package = None
+			raise error
+
+	def save(self, trainer, **extra):
+		self.raiseError()
+		self.queue.put(self.prepare(trainer, **extra))
+
+	"""
+	Blocks until every queued snapshot is on disk.
+	"""
+	def flush(self):
+		self.queue.join()
+		self.raiseError()
+
+	"""
+	Flushes and stops the writer thread.
+	"""
+	def close(self):
+		if self.thread.is_alive():
+			self.queue.put(None)
+			self.thread.join()
+		atexit.unregister(self.close)
+		self.raiseError()
+
+"""
+Replays the segments of a checkpoint directory and rebuilds the trainer. Returns
+(trainer, extra) where extra holds the keyword values given to save.
+"""
+def loadCheckpoint(path):
+	manifest = readManifest(path)
+	if manifest is None:
+		raise FileNotFoundError('No checkpoint in ' + path)
+
+	package, version = legacyPackage(manifest['package'])
+	classes = getClasses(package)
+
+	learnerRows = {} # learner id -> (segment arrays, row)
+	teamRows = {}
+	for segmentName in manifest['segments']:
+		with np.load(os.path.join(path, segmentName)) as npz:
+			seg = {k: npz[k] for k in npz.files}
+		for lrnrId in seg['removedLearners'].tolist():
+			del learnerRows[lrnrId]
+		for teamId in seg['removedTeams'].tolist():
+			del teamRows[teamId]
+		for row, lrnrId in enumerate(seg['learnerId'].tolist()):
+			learnerRows[lrnrId] = (seg, row)
+		for row, teamId in enumerate(seg['teamId'].tolist()):
+			teamRows[teamId] = (seg, row)
+	last = seg
+	header = LegacyUnpickler(io.BytesIO(last['header'].tobytes())).load()
+
+	setClassState(classes, header['classState'])
+	if 'randomState' in header: # not in older checkpoints
+		import_module(package + '.rng').stream.setstate(header['randomState'])
+	if version is not None:
+		classes['Program'].version = version
+	Team = classes['Team']
+	Learner = classes['Learner']
+	Program = classes['Program']
+	backend = import_module(package + '.backends').getBackend()
+
+	# create teams first so learner actions can point at them
+	teams = {}
+	for teamId in last['teamOrder'].tolist():
+		team = Team.__new__(Team)
+		team.id = teamId
+		team.learners = []
+		team.outcomes = {}
+		team.caseOutcomes = {}
+		team.fitness = None
+		team.roots = None
+		team.numLearnersReferencing = 0
+		teams[teamId] = team
+
+	learners = {}
+	for lrnrId in last['liveLearners'].tolist():
+		seg, row = learnerRows[lrnrId]
+		start, end = seg['programOffsets'][row], seg['programOffsets'][row+1]
+		program = Program.__new__(Program)
+		program.instructions = seg['instructions'][start:end]
+		program.id = int(seg['programId'][row])
+
+		lrnr = Learner.__new__(Learner)
+		lrnr.id = lrnrId
+		lrnr.program = program
+		kind = seg['actionKind'][row]
+		value = int(seg['actionValue'][row])
+		if kind == ActionAtomic:
+			lrnr.action = value
+		elif kind == ActionTeam:
+			lrnr.action = teams[value]
+		else:
+			lrnr.action = seg['multiActions'][value].tolist()
+		for name in LearnerExtras:
+			if 'learner_' + name in seg:
+				value = seg['learner_' + name][row]
+				setattr(lrnr, name, np.array(value) if value.ndim > 0 else value.item())
+		lrnr.clearStates()
+		lrnr.numTeamsReferencing = 0
+		backend.restoreLearner(lrnr)
+		learners[lrnrId] = lrnr
+
+	for name in LearnerState + LegacyLearnerState:
+		if 'state_' + name in last:
+			for lrnrId, value in zip(last['liveLearners'].tolist(), last['state_' + name]):
+				setattr(learners[lrnrId], name, np.array(value))
+	for lrnr in learners.values():
+		if hasattr(lrnr, 'obsSrcs'):
+			lrnr.generateSliceArray()
+
+	# team membership and reference counts
+	for teamId, team in teams.items():
+		seg, row = teamRows[teamId]
+		start, end = seg['teamLearnerOffsets'][row], seg['teamLearnerOffsets'][row+1]
+		team.learners = [learners[lrnrId] for lrnrId in seg['teamLearnerIds'][start:end].tolist()]
+		for lrnr in team.learners:
+			lrnr.numTeamsReferencing += 1
+
+	populationSize = int(last['populationSize'])
+	population = [learners[lrnrId] for lrnrId in last['liveLearners'][:populationSize].tolist()]
+	for lrnr in population:
+		if not lrnr.isActionAtomic():
+			lrnr.action.numLearnersReferencing += 1
+
+	for i, teamId in enumerate(last['teamOrder'].tolist()):
+		team = teams[teamId]
+		for j, task in enumerate(header['tasks']):
+			if not np.isnan(last['outcomes'][i, j]):
+				team.outcomes[task] = last['outcomes'][i, j].item()
+		if not np.isnan(last['fitness'][i]):
+			team.fitness = last['fitness'][i].item()
+
+	Trainer = classes['Trainer']
+	trainer = Trainer.__new__(Trainer)
+	state = dict(header['trainer'])
+	state['learners'] = population
+	state['teams'] = [teams[teamId] for teamId in last['teamOrder'].tolist()]
+	state['rootTeams'] = [teams[teamId] for teamId in last['rootTeams'].tolist()]
+	state['elites'] = [teams[teamId] for teamId in last['elites'].tolist()]
+	trainer.__setstate__(state) # as unpickled, rebuilds the root team set
+
+	return trainer, header['extra']
@@ -0,0 +1,114 @@
+import os
+import tempfile
+
+import numpy as np
+
+try:
+	from multiprocessing import shared_memory
+except ImportError: # Python < 3.8
+	shared_memory = None
+
+"""
+Dataset helpers shared by main.py and the plotting/evaluation scripts. Nothing in
+here imports tensorflow at module level, tensorflow is only pulled in the first
+time the dataset has to be downloaded.
+"""
+
+# Local copy of the dataset so later runs never need tensorflow at all
+DataCache = 'fashion_mnist.npz'
+
+# Shared memory blocks attached to by this (worker) process
+_attached = []
+
+"""
+Returns ((train_x, train_y), (test_x, test_y)) for Fashion-MNIST, reading the
+local cache if it exists and otherwise downloading it through keras once.
+"""
+def load_data(cacheFile=DataCache):
+	if cacheFile is not None and os.path.exists(cacheFile):
+		with np.load(cacheFile) as data:
+			return ((data['train_x'], data['train_y']),
+					(data['test_x'], data['test_y']))
+
+	import tensorflow as tf # slow (several seconds), so only when downloading
+	(train_x, train_y), (test_x, test_y) = tf.keras.datasets.fashion_mnist.load_data()
+
+	if cacheFile is not None:
+		np.savez(cacheFile, train_x=train_x, train_y=train_y,
+				test_x=test_x, test_y=test_y)
+
+	return (train_x, train_y), (test_x, test_y)
+
+"""
+Yields consecutive slices of size n from iterable.
+"""
+def batch(iterable, n=1):
+	l = len(iterable)
+	for ndx in range(0, l, n):
+		yield iterable[ndx:min(ndx + n, l)]
+
+"""
+Publishes a set of named arrays (e.g. train_x, train_y) once so that worker
+processes can attach to them by name instead of receiving pickled copies. Uses
+multiprocessing.shared_memory when available (Python 3.8+), otherwise falls
+back to .npy files that the workers memory-map read only.
+"""
+class SharedDataset:
+
+	def __init__(self, arrays, directory=None):
+		self.segments = [] # shared memory blocks owned by this process
+		self.files = [] # fallback files owned by this process
+		self.handle = {} # name -> small picklable description for attach
+
+		for name, arr in arrays.items():
+			arr = np.ascontiguousarray(arr)
+			if shared_memory is not None:
+				shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+				np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+				self.segments.append(shm)
+				self.handle[name] = ('shm', shm.name, arr.shape, arr.dtype.str)
+			else:
+				fd, path = tempfile.mkstemp(suffix='_' + name + '.npy', dir=directory)
+				with os.fdopen(fd, 'wb') as f:
+					np.save(f, arr)
+				self.files.append(path)
+				self.handle[name] = ('npy', path, arr.shape, arr.dtype.str)
+
+	"""
+	Attaches to the arrays described by handle, returns a dict of read only arrays
+	backed by the shared blocks / memory-mapped files (no copy is made).
+	"""
+	@staticmethod
+	def attach(handle):
+		arrays = {}
+		for name, (kind, location, shape, dtype) in handle.items():
+			if kind == 'shm':
+				shm = shared_memory.SharedMemory(name=location)
+				_attached.append(shm) # keep the block mapped while in use
+				arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+			else:
+				arr = np.load(location, mmap_mode='r')
+			arr.flags.writeable = False
+			arrays[name] = arr
+
+		return arrays
+
+	"""
+	Releases the shared blocks / files, only call from the creating process once
+	the workers are done.
+	"""
+	def close(self):
+		for shm in self.segments:
+			shm.close()
+			shm.unlink()
+		for path in self.files:
+			if os.path.exists(path):
+				os.remove(path)
+		self.segments = []
+		self.files = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
@@ -0,0 +1,90 @@
+import numpy as np
+
+from data import SharedDataset
+
+"""
+Scoring agents on the dataset, either in this process or in worker processes.
+Workers attach to the dataset published by data.SharedDataset once at start up
+(see init_worker), so each task only pickles the agent and the sample indices,
+never the dataset or the trainer.
+"""
+
+# Arrays attached to by this worker process, set up by init_worker
+_data = None
+
+"""
+Process pool initializer, attaches to the shared dataset by name and applies the
+class level configuration of the tpg package (see checkpoint.getClassState), which
+is not pickled with the agents. seed is the SeedSequence of the worker's random
+numbers (see tpg.rng.workerSeed).
+"""
+def init_worker(handle, classState=None, seed=None):
+	global _data
+	_data = SharedDataset.attach(handle)
+	if classState is not None:
+		from checkpoint import getClasses, setClassState
+		setClassState(getClasses('tpg'), classState)
+	if seed is not None:
+		from tpg import rng
+		rng.seed(seed)
+
+"""
+Returns the agent's guess for each of the samples at idxs as an int array.
+"""
+def evaluate_guesses(agent, x, idxs):
+	guesses = np.empty(len(idxs), dtype=np.int64)
+	for i, idx in enumerate(idxs):
+		agent.reset()
+		guesses[i] = agent.act(x[idx])
+	return guesses
+
+"""
+Returns a boolean array, True for each of the samples at idxs the agent
+classifies correctly. These are the cases used by lexicase selection.
+"""
+def evaluate_cases(agent, x, y, idxs):
+	return evaluate_guesses(agent, x, idxs) == y[idxs]
+
+"""
+Returns how many of the samples at idxs the agent classifies correctly.
+"""
+def evaluate_agent(agent, x, y, idxs):
+	return int(evaluate_cases(agent, x, y, idxs).sum())
+
+"""
+Worker side evaluation on the shared split ('train' or 'test'), all samples if
+idxs is None. Returns (team id, reward) to be applied with Trainer.applyScores,
+or (team id, guesses) if guesses, to be scored by the caller (see
+class_accuracies).
+"""
+def evaluate_shared(agent, split, idxs=None, guesses=False):
+	x = _data[split + '_x']
+	y = _data[split + '_y']
+	if idxs is None:
+		idxs = range(len(x))
+	if guesses:
+		return agent.team.id, evaluate_guesses(agent, x, idxs)
+	return agent.team.id, evaluate_agent(agent, x, y, idxs)
+
+"""
+The (agents x classes x classes) confusion tensor of an (agents x samples)
+matrix of guesses against the labels, [a, i, j] counts the samples of class i
+that agent a guessed as class j. Guesses that are not a class are dropped.
+"""
+def confusion_matrices(guesses, labels, numClasses):
+	guesses = np.asarray(guesses)
+	numAgents = len(guesses)
+	valid = (guesses >= 0) & (guesses < numClasses)
+	cells = (np.arange(numAgents)[:, None] * numClasses + labels[None, :]) * numClasses + guesses
+	counts = np.bincount(cells[valid], minlength=numAgents * numClasses * numClasses)
+	return counts.reshape(numAgents, numClasses, numClasses)
+
+"""
+Per-class accuracy (recall) of each agent, an (agents x classes) matrix, from
+the confusion tensor of the batch with these labels. Classes with no samples in
+the batch count as 0 for everyone.
+"""
+def class_accuracies(confusion, labels):
+	totals = np.bincount(labels, minlength=confusion.shape[1])
+	correct = np.diagonal(confusion, axis1=1, axis2=2)
+	return correct / np.maximum(totals, 1)
@@ -0,0 +1,66 @@
+from argparse import ArgumentParser
+import subprocess
+import sys
+import time
+
+"""
+Measures the startup cost of the entry points with `python -X importtime` and
+fails if it goes over budget. Run after touching imports in main.py:
+
+	python import_budget.py
+	python import_budget.py --modules main data --budget 0.5 --top 15
+"""
+
+"""
+Imports the modules in a fresh interpreter with -X importtime and returns a list
+of (cumulative seconds, self seconds, depth, module name) for every import.
+"""
+def measure_imports(modules):
+	code = '; '.join('import ' + m for m in modules)
+	proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+			stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+	imports = []
+	for line in proc.stderr.splitlines():
+		if not line.startswith('import time:') or 'cumulative' in line:
+			continue
+		selfUs, cumulativeUs, name = line[len('import time:'):].split('|')
+		depth = (len(name) - len(name.lstrip()) - 1) // 2
+		imports.append((int(cumulativeUs)/1e6, int(selfUs)/1e6, depth, name.strip()))
+
+	return imports
+
+"""
+Wall time of running a script end to end in a fresh interpreter.
+"""
+def measure_wall(argv):
+	start = time.perf_counter()
+	subprocess.run([sys.executable] + argv, stdout=subprocess.DEVNULL,
+			stderr=subprocess.DEVNULL, check=True)
+	return time.perf_counter() - start
+
+def main(args):
+	imports = measure_imports(args.modules)
+	total = sum(imp[0] for imp in imports if imp[2] == 0)
+
+	print('Slowest imports (cumulative):')
+	for cumulative, selfTime, depth, name in sorted(imports, reverse=True)[:args.top]:
+		print('  {:8.1f} ms  {:8.1f} ms self  {}{}'.format(
+			cumulative*1000, selfTime*1000, '  '*depth, name))
+
+	wall = measure_wall(['main.py', '--help'])
+	print('Import time for {}: {:.1f} ms (budget {:.1f} ms)'.format(
+		', '.join(args.modules), total*1000, args.budget*1000))
+	print('Wall time for main.py --help: {:.1f} ms'.format(wall*1000))
+
+	if total > args.budget:
+		print('Over budget')
+		return 1
+	return 0
+
+if __name__ == '__main__':
+	parser = ArgumentParser()
+	parser.add_argument('--modules', nargs='+', default=['main'], help='Modules to import')
+	parser.add_argument('--budget', type=float, default=0.25, help='Maximum import time in seconds')
+	parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to show')
+	sys.exit(main(parser.parse_args()))
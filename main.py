@@ -1,103 +1,251 @@
 from argparse import ArgumentParser
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import repeat
 import os
-import pickle
-import random
 
-import numpy as np
-import tensorflow as tf
-from tqdm import tqdm
+# Everything heavy (numpy, numba via the tpg packages, tqdm, tensorflow) is
+# imported inside the functions that need it so that quick operations like
+# --help or --evaluate start fast. Check with `python import_budget.py`.
 
-# Doing this because eventually I will refactor everything to a v1, v2, v3 version of main and this will be a common function called in another 'header' file
-def load_data():
-	return tf.keras.datasets.fashion_mnist.load_data()
+# --version -> description, the version is passed to the Trainer (see tpg.backends)
+Versions = {
+	1: 'Using TPG Trainer V1 (no additional techniques)',
+	2: 'Using TPG Trainer V2 (shared registers)',
+	3: 'Using TPG Trainer V3 (shared registers with vector and matrix support)',
+	4: 'Using TPG Trainer V4 (shared registers with sub-observation indexing)',
+	5: 'Using TPG Trainer V5 (shared registers with multiple sub-observation indexing)',
+}
 
-def batch(iterable, n=1):
-	l = len(iterable)
-	for ndx in range(0, l, n):
-		yield iterable[ndx:min(ndx + n, l)]
+# --selection -> multiTaskType for Trainer.evolve, None is the trainer's default
+Selections = {
+	'single': None,
+	'min': 'min',
+	'max': 'max',
+	'average': 'average',
+	'paretoDominate': 'paretoDominate',
+	'paretoNonDominated': 'paretoNonDominated',
+	'paretoFront': 'paretoFront',
+	'lexicaseStatic': 'lexicaseStatic',
+	'lexicaseDynamic': 'lexicaseDynamic',
+	'fitnessSharing': 'fitnessSharing',
+}
 
-parser = ArgumentParser()
-parser.add_argument('--version', type=int, default=1, help='Which version of the TPG you want to use')
-args = parser.parse_args()
+# Fashion-MNIST classes, one task each with --tasks classes
+NumClasses = 10
+ClassTasks = ['class' + str(c) for c in range(NumClasses)]
+
+def get_parser():
+	parser = ArgumentParser()
+	parser.add_argument('--version', type=int, default=1, help='Which version of the TPG you want to use')
+	parser.add_argument('--evaluate', action='store_true', help='Only evaluate the agents in the existing checkpoint on the test set')
+	parser.add_argument('--workers', type=int, default=1, help='Number of processes to evaluate agents with, the dataset is shared between them')
+	parser.add_argument('--selection', default='single', choices=Selections,
+			help='How to score the agents, lexicase uses each training sample as a case')
+	parser.add_argument('--tasks', default='total', choices=['total', 'classes'],
+			help='Score the total correct, or the accuracy on each class as a separate task')
+	parser.add_argument('--trace', action='store_true',
+			help='Also write the time of each training phase to trace_vN.json (Chrome trace format)')
+	parser.add_argument('--profile', action='store_true',
+			help='Count the operations run by the programs each generation, in the results log (only with --workers 1)')
+	parser.add_argument('--seed', type=int, default=None,
+			help='Seed of the random numbers, a run with the same seed (and any --workers) evolves the same population. '
+				'A resumed run continues with the random numbers saved in the checkpoint')
+	return parser
+
+"""
+Imports the trainer module, only when it is needed.
+"""
+def get_trainer_class(version):
+	from tpg.trainer import Trainer
+
+	print(Versions[version])
+	return Trainer
+
+"""
+Runs every agent over the test set and returns (best agent number, best reward).
+If pool is given the agents are evaluated in the worker processes.
+"""
+def test_agents(trainer, test_x, test_y, gen, pool=None):
+	from tqdm import tqdm
+	from evaluation import evaluate_agent, evaluate_shared
+
+	agents = trainer.getAgents()
+	desc = 'Testing generation: {}'.format(gen)
+	if pool is None:
+		rewards = [evaluate_agent(agent, test_x, test_y, range(len(test_x)))
+				for agent in tqdm(agents, desc=desc, leave=False)]
+	else:
+		rewards = [reward for _, reward in tqdm(
+				pool.map(evaluate_shared, agents, repeat('test')),
+				desc=desc, total=len(agents), leave=False)]
+
+	best_agent = None
+	best_reward = 0
+	for agent, agent_reward in zip(agents, rewards):
+		if best_agent is None or agent_reward > best_reward:
+			best_agent = agent.agentNum
+			best_reward = agent_reward
+	return best_agent, best_reward
 
 def main(args):
-	(train_x, train_y), (test_x, test_y) = load_data()
+	if args.version not in Versions:
+		print('Please select a valid version')
+		return 0
+	if args.profile and args.workers > 1:
+		# the bids are made in the workers, which the profiler doesn't see
+		print('--profile only counts the programs run in this process, use --workers 1')
+		return 0
+
 	gens = 100
 	rootTeamSize = 100
 	batchSize = 1000
 	version = 'v' + str(args.version)
-	checkpoint_name = 'checkpoint_' + version + '.tpg'
-
-	if version == 'v1':
-		print('Using TPG Trainer V1 (no additional techniques)')
-		from tpg_v1.trainer import Trainer
-	elif version == 'v2':
-		print('Using TPG Trainer V2 (shared registers)')
-		from tpg_v2.trainer import Trainer
-	elif version == 'v3':
-		print('Using TPG Trainer V3 (shared registers with vector and matrix support)')
-		from tpg_v3.trainer import Trainer
-	elif version == 'v4':
-		print('Using TPG Trainer V4 (shared registers with sub-observation indexing)')
-		from tpg_v4.trainer import Trainer
-	elif version == 'v5':
-		print('Using TPG Trainer V5 (shared registers with multiple sub-observation indexing)')
-		from tpg_v5.trainer import Trainer
-	else:
-		print('Please select a valid version')
-		return 0
+	checkpoint_name = 'checkpoint_' + version
+	legacy_checkpoint_name = checkpoint_name + '.tpg' # single pickle, older runs
+	results_name = 'results_' + version + '.jsonl'
+	trace_name = 'trace_' + version + '.json' if args.trace else None
 
-	if os.path.exists(checkpoint_name):
+	Trainer = get_trainer_class(args.version)
+
+	from tpg import rng
+	seed = rng.seed(args.seed)
+	print('Seed: {}'.format(seed.entropy))
+
+	from checkpoint import AsyncCheckpointWriter, loadCheckpoint, loadPickle, readManifest
+	from results_log import ResultsLog
+
+	results = ResultsLog(results_name)
+	if readManifest(checkpoint_name) is not None:
 		print('Loading previous checkpoint')
-		with open(checkpoint_name, 'rb') as f:
-			temp = pickle.load(f)
-			trainer = temp['trainer']
-			gen = temp['gen']
-			results = temp['results']
-			del temp
+		trainer, temp = loadCheckpoint(checkpoint_name)
+		gen = temp['gen']
+		del temp
+	elif os.path.exists(legacy_checkpoint_name):
+		print('Loading previous checkpoint (converted on next save)')
+		temp = loadPickle(legacy_checkpoint_name)
+		trainer = temp['trainer']
+		gen = temp['gen']
+		if not os.path.exists(results_name):
+			for result_gen, best_reward in temp['results']:
+				results.append(gen=result_gen, best_reward=best_reward)
+		del temp
+	elif args.evaluate:
+		print('No checkpoint to evaluate')
+		return 0
 	else:
 		print('Making new checkpoint')
-		trainer = Trainer(range(10), rootTeamSize, sourceRange=784)#, sourceDims=(28,28))
+		trainer = Trainer(range(10), rootTeamSize, sourceRange=784, sourceDims=(28,28),
+				version=args.version)
 		gen = 1
-		results = []
+
+	from data import load_data
+
+	(train_x, train_y), (test_x, test_y) = load_data()
+
+	pool = None
+	if args.workers > 1:
+		# publish the dataset once, workers attach to it by name
+		from concurrent.futures import ProcessPoolExecutor
+		from checkpoint import getClasses, getClassState
+		from data import SharedDataset
+		from evaluation import init_worker
+
+		shared = SharedDataset({'train_x': train_x, 'train_y': train_y,
+								'test_x': test_x, 'test_y': test_y})
+		pool = ProcessPoolExecutor(args.workers, initializer=init_worker,
+									initargs=(shared.handle, getClassState(getClasses('tpg')),
+											rng.workerSeed()))
+
+	checkpoint = None
+	try:
+		if args.evaluate:
+			best_agent, best_reward = test_agents(trainer, test_x, test_y, gen-1, pool=pool)
+			print('Gen {}, Agent #{}, Reward: {}/{}'.format(gen-1, best_agent, best_reward, len(test_x)))
+			return 0
+
+		# written in the background while the next generation trains
+		checkpoint = AsyncCheckpointWriter(checkpoint_name)
+		train(trainer, train_x, train_y, test_x, test_y, gen, results,
+				batchSize, checkpoint, pool=pool,
+				multiTaskType=Selections[args.selection],
+				classTasks=args.tasks == 'classes', trace_name=trace_name,
+				profile=args.profile)
+	finally:
+		if checkpoint is not None:
+			checkpoint.close()
+		if pool is not None:
+			pool.shutdown()
+			shared.close()
+
+def train(trainer, train_x, train_y, test_x, test_y, gen, results,
+		batchSize, checkpoint, pool=None, multiTaskType=None, classTasks=False,
+		trace_name=None, profile=False):
+	import time
+	import numpy as np
+	from tqdm import tqdm
+	from data import batch
+	from tpg.rng import stream
+	from evaluation import evaluate_guesses, evaluate_shared, confusion_matrices, class_accuracies
+	from results_log import trainerStats
+	from timing import PhaseTimer
+
+	tasks = ClassTasks if classTasks else ['task']
+	# lexicase and fitness sharing on the total need the result on every sample
+	cases = not classTasks and multiTaskType in ('lexicaseStatic', 'lexicaseDynamic', 'fitnessSharing')
+	# time of each phase per generation, for the results log and --trace
+	timer = PhaseTimer(trace=trace_name is not None)
+	from tpg.program import Program
+	profiler = None
+	if profile:
+		from tpg.profiler import ProgramProfiler
+		profiler = ProgramProfiler()
+	Program.profiler = profiler
+	evolveArgs = {'tasks': tasks, 'timer': timer}
+	if multiTaskType is not None:
+		evolveArgs['multiTaskType'] = multiTaskType
 
 	#while gen < gens:
 	while True:
-		dataIdx = list(range(len(train_x)))
-		random.shuffle(dataIdx)
+		start_time = time.time()
+		timer.mark('Generation {}'.format(gen))
+		dataIdx = stream.permutation(len(train_x))
 		all_batches = [b for b in batch(dataIdx, n=batchSize)]
 		for cur_batch in tqdm(all_batches, desc='Training batch', leave=False):
-			agents = trainer.getAgents()
-			for agent in agents:
-				total_reward = 0
-				for idx in cur_batch:
-					agent.reset()
-					guess = agent.act(train_x[idx])
-					if guess == train_y[idx]:
-						total_reward += 1
-				agent.reward(total_reward)
-			trainer.evolve()
-		best_agent = None
-		best_reward = 0
-		agents = trainer.getAgents()
-		for agent in tqdm(agents, desc='Testing generation: {}'.format(gen), leave=False):
-			agent_reward = 0
-			for idx in range(len(test_x)):
-				agent.reset()
-				guess = agent.act(test_x[idx])
-				if guess == test_y[idx]:
-					agent_reward += 1
-			if best_agent is None or agent_reward > best_reward:
-				best_agent = agent.agentNum
-				best_reward = agent_reward
+			with timer.phase('evaluate'):
+				agents = trainer.getAgents()
+				# one pass over the batch per agent, everything is scored from the guesses
+				if pool is None:
+					guesses = np.array([evaluate_guesses(agent, train_x, cur_batch) for agent in agents])
+				else:
+					guesses = np.array([agentGuesses for _, agentGuesses in pool.map(evaluate_shared,
+							agents, repeat('train'), repeat(cur_batch), repeat(True))])
+			with timer.phase('score'):
+				labels = train_y[cur_batch]
+				if classTasks:
+					outcomes = class_accuracies(confusion_matrices(guesses, labels, NumClasses), labels)
+					trainer.applyOutcomes(agents, tasks, outcomes)
+				else:
+					correct = guesses == labels
+					trainer.applyOutcomes(agents, tasks, correct.sum(axis=1)[:, None],
+							cases={'task': correct} if cases else None)
+			trainer.evolve(**evolveArgs)
+		train_time = time.time()
+		with timer.phase('test'):
+			best_agent, best_reward = test_agents(trainer, test_x, test_y, gen, pool=pool)
+		test_time = time.time()
 		print('Gen {}, Agent #{}, Reward: {}/{}'.format(gen, best_agent, best_reward, len(test_x)))
-		results.append([gen, best_reward])
 		gen += 1
-		with open(checkpoint_name, 'wb') as f:
-			pickle.dump({'trainer': trainer, 'gen': gen, 'results': results}, f)
-		
+		with timer.phase('checkpoint'):
+			checkpoint.save(trainer, gen=gen)
+		end_time = time.time()
+		results.append(gen=gen-1, best_agent=best_agent, best_reward=best_reward,
+			test_size=len(test_x), train_time=train_time-start_time,
+			test_time=test_time-train_time, checkpoint_time=end_time-test_time,
+			**trainerStats(trainer), **timer.generationStats(),
+			**(profiler.generationStats() if profiler is not None else {}))
+		if trace_name is not None:
+			timer.writeTrace(trace_name)
+
 
 
 if __name__ == '__main__':
-	main(args)
\ No newline at end of file
+	main(get_parser().parse_args())
@@ -1,43 +1,25 @@
-import pickle
+import os
 
 import matplotlib.pyplot as plt
 import numpy as np
 
-with open('checkpoint_v1.tpg', 'rb') as f:
-    trainer_v1 = pickle.load(f)
-with open('checkpoint_v2.tpg', 'rb') as f:
-    trainer_v2 = pickle.load(f)
-with open('checkpoint_v3.tpg', 'rb') as f:
-    trainer_v3 = pickle.load(f)
-with open('checkpoint_v4.tpg', 'rb') as f:
-    trainer_v4 = pickle.load(f)
-with open('checkpoint_v5.tpg', 'rb') as f:
-    trainer_v5 = pickle.load(f)
+from results_log import readResults
 
-v1_x = np.asarray([x[0] for x in trainer_v1['results']])
-v1_y = np.asarray([x[1] for x in trainer_v1['results']])
-
-v2_x = np.asarray([x[0] for x in trainer_v2['results']])
-v2_y = np.asarray([x[1] for x in trainer_v2['results']])
-
-v3_x = np.asarray([x[0] for x in trainer_v3['results']])
-v3_y = np.asarray([x[1] for x in trainer_v3['results']])
-
-v4_x = np.asarray([x[0] for x in trainer_v4['results']])
-v4_y = np.asarray([x[1] for x in trainer_v4['results']])
-
-v5_x = np.asarray([x[0] for x in trainer_v5['results']])
-v5_y = np.asarray([x[1] for x in trainer_v5['results']])
+# Reads the small per-generation logs written by main.py (results_vN.jsonl)
+# rather than unpickling every checkpoint.
 
 fig, ax = plt.subplots()  # Create a figure and an axes.
-ax.plot(v1_x, v1_y, label='Version 1')  # Plot some data on the axes.
-ax.plot(v2_x, v2_y, label='Version 2')  # Plot more data on the axes...
-ax.plot(v3_x, v3_y, label='Version 3')  # ... and some more.
-ax.plot(v4_x, v4_y, label='Version 4')  # ... and some more.
-ax.plot(v5_x, v5_y, label='Version 5')  # ... and some more.
+for version in range(1, 6):
+    log_name = 'results_v{}.jsonl'.format(version)
+    if not os.path.exists(log_name):
+        continue
+    results = readResults(log_name)
+    x = np.asarray([r['gen'] for r in results])
+    y = np.asarray([r['best_reward'] for r in results])
+    ax.plot(x, y, label='Version {}'.format(version))  # Plot some data on the axes.
 ax.set_xlabel('Generation')  # Add an x-label to the axes.
 ax.set_ylabel('Fitness')  # Add a y-label to the axes.
 ax.set_title("TPG Version Fitness")  # Add a title to the axes.
 ax.legend()  # Add a legend.
 
-fig.savefig('temp.png')
\ No newline at end of file
+fig.savefig('temp.png')
@@ -0,0 +1,59 @@
+import json
+import os
+
+"""
+Small append-only log of per-generation results and statistics (one json object
+per line), kept next to the checkpoint so plotting and monitoring only read a
+few kilobytes instead of loading every population.
+"""
+
+"""
+Appends one record per generation to a .jsonl file.
+"""
+class ResultsLog:
+
+	def __init__(self, path):
+		self.path = path
+
+	"""
+	Appends a record, flushed straight away so a crash loses at most this line.
+	"""
+	def append(self, **record):
+		with open(self.path, 'a') as f:
+			f.write(json.dumps(record) + '\n')
+			f.flush()
+
+"""
+Reads the records of a results log, ordered by generation. If a generation was
+logged more than once (a run resumed from an older checkpoint) the last record
+wins. A partially written last line is ignored.
+"""
+def readResults(path):
+	records = {}
+	if not os.path.exists(path):
+		return []
+	with open(path, 'r') as f:
+		for line in f:
+			try:
+				record = json.loads(line)
+			except ValueError:
+				continue
+			records[record['gen']] = record
+
+	return [records[gen] for gen in sorted(records)]
+
+"""
+Summary of the trainer population and fitness after a generation.
+"""
+def trainerStats(trainer):
+	stats = {
+		'teams': len(trainer.teams),
+		'rootTeams': len(trainer.rootTeams),
+		'learners': len(trainer.learners),
+	}
+	if hasattr(trainer, 'fitnessStats'):
+		stats['fitnessMin'] = float(trainer.fitnessStats['min'])
+		stats['fitnessMax'] = float(trainer.fitnessStats['max'])
+		stats['fitnessAverage'] = float(trainer.fitnessStats['average'])
+
+	return stats
@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pytest
+
+from checkpoint import AsyncCheckpointWriter, CheckpointWriter, loadCheckpoint, readManifest
+from tpg import rng
+from tpg.backends import getBackend
+from tpg.profiler import ProgramProfiler
+from tpg.program import Program
+from tpg.trainer import Trainer
+
+"""
+Tests of the checkpoint format, run from the repository root with
+python -m pytest.
+"""
+
+"""
+Everything the checkpoint stores of the trainer's population, comparable
+between the trainer and the one loaded back.
+"""
+def describe(trainer):
+	def action(lrnr):
+		return lrnr.action if lrnr.isActionAtomic() else ('team', lrnr.action.id)
+
+	learners = []
+	for lrnr in trainer.learners:
+		extras = {name: np.asarray(getattr(lrnr, name)).tolist()
+			for name in ('shareIndex', 'mode', 'numRegisters', 'obsSrc', 'obsSrcs')
+				if hasattr(lrnr, name)}
+		if getBackend().persistentRegisters:
+			extras['registers'] = lrnr.registers.tolist()
+		learners.append((lrnr.id, lrnr.program.id, lrnr.program.instructions.tolist(),
+			action(lrnr), extras, lrnr.numTeamsReferencing))
+	teams = [(team.id, [lrnr.id for lrnr in team.learners], team.outcomes, team.fitness,
+		team.numLearnersReferencing) for team in trainer.teams]
+	return {'learners': learners, 'teams': teams,
+		'rootTeams': [team.id for team in trainer.rootTeams],
+		'elites': [team.id for team in trainer.elites]}
+
+"""
+A generation scored on a random state, leaving registers in the learners that
+keep them.
+"""
+def evolveRandom(trainer):
+	state = np.array([rng.stream.randint(0, 255) for _ in range(784)], dtype=np.uint8)
+	for agent in trainer.getAgents():
+		agent.reward(int(agent.act(state) == rng.stream.randint(0, 9)))
+	trainer.evolve()
+
+"""
+Saves (full snapshots, deltas and compaction after maxSegments) load back the
+same population for every version, also when a resumed run carries on writing
+to the same checkpoint, and files of others in the directory are left alone.
+"""
+@pytest.mark.parametrize('version', [1, 2, 3, 4, 5])
+@pytest.mark.parametrize('writerClass', [CheckpointWriter, AsyncCheckpointWriter])
+def test_round_trip(tmp_path, version, writerClass):
+	rng.seed(version)
+	trainer = Trainer(range(10), 20, sourceRange=784, version=version)
+	path = os.path.join(str(tmp_path), 'checkpoint')
+	os.makedirs(path)
+	notes = os.path.join(path, 'notes.txt')
+	with open(notes, 'w') as f:
+		f.write('not the checkpoint')
+
+	writer = writerClass(path, maxSegments=3)
+	segments = []
+	for gen in range(5):
+		evolveRandom(trainer)
+		writer.save(trainer, gen=gen)
+		writer.flush()
+		segments.append(len(readManifest(path)['segments']))
+
+		loaded, extra = loadCheckpoint(path)
+		assert extra['gen'] == gen
+		assert describe(loaded) == describe(trainer)
+	writer.close()
+	assert segments == [1, 2, 3, 1, 2]
+
+	# resume: carry on from the loaded trainer with a new writer
+	trainer, _ = loadCheckpoint(path)
+	writer = writerClass(path, maxSegments=3)
+	evolveRandom(trainer)
+	writer.save(trainer, gen=5)
+	writer.close()
+	assert len(readManifest(path)['segments']) == 3 # appended a delta
+
+	loaded, extra = loadCheckpoint(path)
+	assert extra['gen'] == 5
+	assert describe(loaded) == describe(trainer)
+	assert os.path.exists(notes)
+
+"""
+A resumed run continues with the random numbers of the run that saved.
+"""
+def test_random_stream_is_restored(tmp_path):
+	rng.seed(1)
+	trainer = Trainer(range(10), 10, sourceRange=784, version=5)
+	path = os.path.join(str(tmp_path), 'checkpoint')
+	CheckpointWriter(path).save(trainer, gen=0)
+	following = ([rng.stream.random() for _ in range(10)], rng.stream.permutation(10).tolist())
+
+	rng.seed(2)
+	loadCheckpoint(path)
+
+	assert ([rng.stream.random() for _ in range(10)], rng.stream.permutation(10).tolist()) == following
+
+"""
+The profiler and clamp counter of a --profile run are not saved, a resumed run
+only profiles if asked to again.
+"""
+def test_process_state_is_not_saved(tmp_path):
+	trainer = Trainer(range(10), 10, sourceRange=784, version=2)
+	path = os.path.join(str(tmp_path), 'checkpoint')
+	clamps = Program.clamps
+	Program.profiler = ProgramProfiler()
+	try:
+		CheckpointWriter(path).save(trainer, gen=2)
+	finally:
+		Program.profiler = None
+
+	_, extra = loadCheckpoint(path)
+
+	assert extra['gen'] == 2
+	assert Program.profiler is None
+	assert Program.clamps is clamps
@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from checkpoint import getClasses, getClassState
+from data import SharedDataset
+from evaluation import evaluate_guesses, evaluate_shared, init_worker
+from tpg import rng
+from tpg.trainer import Trainer
+
+"""
+Tests of agent evaluation in this process and in worker processes, run from the
+repository root with python -m pytest.
+"""
+
+"""
+A seeded run gives every agent the same guesses whether it is evaluated here or
+in the workers, also once learners point at other teams.
+"""
+def test_serial_and_pooled_guesses_match():
+	rng.seed(5)
+	images = np.random.randint(0, 256, (40, 28, 28)).astype(np.uint8)
+	labels = np.random.randint(0, 10, 40)
+	samples = list(range(len(images)))
+	trainer = Trainer(range(10), 20, sourceRange=784, sourceDims=(28, 28), version=2)
+
+	shared = SharedDataset({'train_x': images, 'train_y': labels})
+	pool = ProcessPoolExecutor(2, initializer=init_worker,
+			initargs=(shared.handle, getClassState(getClasses('tpg')), rng.workerSeed()))
+	try:
+		for _ in range(6):
+			agents = trainer.getAgents()
+			serial = np.array([evaluate_guesses(agent, images, samples) for agent in agents])
+			pooled = np.array([guesses for _, guesses in pool.map(evaluate_shared,
+					agents, repeat('train'), repeat(samples), repeat(True))])
+			assert np.array_equal(serial, pooled)
+
+			correct = serial == labels
+			trainer.applyOutcomes(agents, ['task'], correct.sum(axis=1)[:, None])
+			trainer.evolve()
+	finally:
+		pool.shutdown()
+		shared.close()
+
+	assert any(not lrnr.isActionAtomic() for lrnr in trainer.learners)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from tpg import rng
+from tpg.learner import Learner
+from tpg.trainer import Trainer
+
+"""
+Tests of learners, run from the repository root with python -m pytest.
+"""
+
+"""
+Mutating a copied learner (program, action and sub-observation) leaves the
+learner it was copied from as it was, the copy shares its instructions,
+obsSrc(s) and obsSlc until then, and keeps their dtypes.
+"""
+@pytest.mark.parametrize('version', [2, 4, 5])
+def test_mutating_a_copy_leaves_the_original(version):
+	rng.seed(version)
+	trainer = Trainer(range(10), 10, sourceRange=784, version=version)
+	names = [name for name in ('obsSrc', 'obsSrcs', 'obsSlc')
+		if hasattr(trainer.learners[0], name)]
+
+	for parent in trainer.learners:
+		before = {name: np.array(getattr(parent, name)) for name in names}
+		instructions = parent.program.instructions.copy()
+
+		child = Learner(learner=parent)
+		child.mutate(trainer.pMutProg, 1.0, trainer.pActAtom, trainer.actions, None, trainer.teams,
+			trainer.pDelInst, trainer.pAddInst, trainer.pSwpInst, trainer.pMutInst,
+			None, trainer.pSwapMultiAct, trainer.pChangeMultiAct, 0)
+
+		assert not parent.program.instructions.flags.writeable
+		assert np.array_equal(parent.program.instructions, instructions)
+		for name in names:
+			assert np.array_equal(getattr(parent, name), before[name])
+			assert getattr(child, name).dtype == before[name].dtype
+		if version > 3:
+			assert any(not np.array_equal(getattr(child, name), before[name]) for name in names)
+
+"""
+Past Learner.MaxSavedStates saves the oldest states are overwritten in the ring
+buffer, which never grows.
+"""
+def test_saved_states_wrap_around():
+	learner = Trainer(range(10), 10, sourceRange=784, version=2).learners[0]
+	assert len(learner.savedStates()) == 0
+
+	for count in range(1, 2*Learner.MaxSavedStates + 8):
+		learner.saveState(1000 + count)
+		kept = range(max(1, count - Learner.MaxSavedStates + 1), count + 1)
+		assert sorted(learner.savedStates().tolist()) == [1000 + i for i in kept]
+	assert learner.states.shape == (Learner.MaxSavedStates,)
+	assert learner.savedStates().dtype == np.int32
@@ -0,0 +1,72 @@
+import numpy as np
+
+from tpg.agent import Agent
+from tpg.learner import Learner
+from tpg.profiler import ProgramProfiler
+from tpg.program import Program
+from tpg.trainer import Trainer
+
+"""
+Tests of the program profiler (main.py --profile), run from the repository root
+with python -m pytest.
+"""
+
+"""
+The profiler's stats of bids of a learner with the instructions (rows of mode,
+operation, share destination, destination, share source, source) of version on
+state, with the learner's mode (version 3) if given.
+"""
+def profileBids(version, instructions, state, bids=2, mode=None):
+	Trainer(range(10), 10, sourceRange=784, version=version) # configures the classes
+	learner = Learner(program=Program(np.array(instructions)), action=0)
+	learner.shareIndex = 0
+	if mode is not None:
+		learner.mode = mode
+	memory = Agent.newMemory()
+
+	profiler = ProgramProfiler()
+	Program.profiler = profiler
+	try:
+		for _ in range(bids):
+			learner.bid(state, memory)
+	finally:
+		Program.profiler = None
+	return profiler.generationStats()
+
+"""
+Operations, sources and clamps of the shared registers kernel, squaring an
+input until it overflows.
+"""
+def test_counts_of_a_shared_registers_program():
+	state = np.zeros(784, dtype=np.uint8)
+	state[5] = 200
+	state[7] = 10
+	instructions = ([(1, 0, 0, 0, 0, 5)] # input 5 into register 0
+		+ [(0, 2, 0, 0, 0, 0)]*10 # squared, infinite (clamped) from the 8th time
+		+ [(0, 0, 0, 1, 1, 2), # shared register 2 added to register 1
+		(1, 0, 1, 3, 0, 7)]) # input 7 added to shared register 3
+
+	stats = profileBids(2, instructions, state)
+
+	assert stats['profileExecutions'] == 2
+	assert stats['profileInstructions'] == 26
+	assert stats['profileOperations'] == {'scalar.add': 4, 'scalar.mul': 20, 'scalar.sharedAdd': 2}
+	assert stats['profileSources'] == {'register': 20, 'input': 4, 'shared': 2}
+	assert stats['profileClamps'] == 6
+
+"""
+Programs of version 3 learners are counted under the kernel of their mode, and
+generationStats starts counting again.
+"""
+def test_counts_by_kernel():
+	state = np.full((28, 28), 3, dtype=np.uint8)
+	instructions = [(1, 0, 0, 0, 0, 1), (0, 2, 0, 1, 0, 0), (0, 0, 1, 0, 0, 1)]
+
+	vector = profileBids(3, instructions, state, mode=1)
+	matrix = profileBids(3, instructions, state, bids=1, mode=2)
+
+	assert vector['profileOperations'] == {'vector.add': 2, 'vector.mul': 2, 'vector.dot': 2}
+	assert vector['profileSources'] == {'register': 4, 'input': 2, 'shared': 0}
+	assert matrix['profileOperations'] == {'matrix.add': 1, 'matrix.hadamard': 1, 'matrix.sumProduct': 1}
+	assert matrix['profileExecutions'] == 1
+	assert matrix['profileClamps'] == 0
@@ -0,0 +1,188 @@
+import numpy as np
+
+from benchmarks.execute_vector import executeVectorReference, makePrograms, runAll
+from tpg.program import Program
+from tpg.trainer import Trainer
+
+"""
+Tests of the program kernels, run from the repository root with python -m pytest.
+"""
+
+"""
+Input address of row x, column y of the observation.
+"""
+def position(x, y):
+	return (x << Program.xShift) | y
+
+"""
+Version 3 programs running every vector operation, into the vector registers and
+the shared registers, from the registers and from input rows and columns that
+run past the edge of the observation.
+"""
+def vectorPrograms():
+	programs = []
+	for op in range(8):
+		for dshr in range(2):
+			for mode in range(2):
+				for sshr in range(2):
+					src = 2 if mode == 0 else position(27, 24)
+					programs.append(np.array([(1, 0, 0, 1, 0, position(3, 5)),
+						(1, 0, 0, 2, 1, position(25, 26)),
+						(mode, op, dshr, 1, sshr, src)]))
+	return programs
+
+"""
+The in place execute_vector gives the same bids and shared registers as the
+allocating version it replaced, on hand written and random programs, with
+clamping on the bright inputs.
+"""
+def test_execute_vector_matches_reference():
+	Trainer(range(10), 10, sourceRange=784, version=3) # configures the classes
+	programs = vectorPrograms() + makePrograms(32, 100)
+	images = [np.random.default_rng(0).integers(0, 256, (28, 28)).astype(np.uint8),
+		np.full((28, 28), 255, dtype=np.uint8)]
+
+	referenceBids, referenceShared = runAll(executeVectorReference, programs, images, 8, False)
+	bids, shared = runAll(Program.execute_vector, programs, images, 8, True)
+
+	assert np.allclose(bids, referenceBids, rtol=1e-9)
+	assert np.allclose(shared, referenceShared, rtol=1e-9)
+
+"""
+Runs the rows (mode, operation, share destination, destination, share source,
+source) on execute_matrix with two 3x3 matrix registers and the input inpt,
+source addresses being row << 4 | column. Returns the bid, the registers, the
+used group of shared registers and the number of clamps.
+"""
+def runMatrix(rows, inpt):
+	mats = np.zeros((2, 3, 3))
+	src = np.zeros((3, 3))
+	tmp = np.zeros((3, 3))
+	shared = np.zeros((2, 8))
+	clamps = np.zeros(1, dtype=np.int64)
+	ins = np.array(rows, dtype=np.int64)
+	bid = Program.execute_matrix(inpt, inpt.shape, mats, src, tmp, ins[:,0], ins[:,1], ins[:,2],
+		ins[:,3], ins[:,4], ins[:,5], shared, 1, 4, 15, clamps)
+	return bid, mats, shared[1], clamps[0]
+
+Inputs = np.arange(36, dtype=np.float64).reshape(6, 6)
+P = Inputs[1:4, 2:5] # patch at (1, 2), loaded into register 0
+Q = Inputs[3:6, 0:3] # patch at (3, 0), loaded into register 1
+Load = [(1, 0, 0, 0, 0, 1 << 4 | 2), (1, 0, 0, 1, 0, 3 << 4 | 0)]
+
+"""
+Patches are read at their address, every other pixel with the share source
+bit, zero past the edge of the input.
+"""
+def test_execute_matrix_reads_patches():
+	bid, mats, _, _ = runMatrix(Load + [(1, 0, 0, 0, 1, 2 << 4 | 4)], Inputs)
+
+	assert bid == P[0, 0] + Inputs[2, 4]
+	assert np.array_equal(mats[1], Q)
+	assert np.array_equal(mats[0] - P, [[16, 0, 0], [28, 0, 0], [0, 0, 0]])
+
+"""
+Each matrix operation on register 1 (Q) with register 0 (P) as the source.
+"""
+def test_execute_matrix_operations():
+	padded = np.pad(P, 1)
+	pooled = np.pad(P, ((0, 1), (0, 1)), constant_values=-np.inf)
+	expected = [Q + P, Q - P, Q * P, Q @ P, P.T,
+		np.array([[np.sum(Q * padded[r:r+3, c:c+3]) for c in range(3)] for r in range(3)]),
+		np.array([[pooled[r:r+2, c:c+2].max() for c in range(3)] for r in range(3)]),
+		np.tanh(P)]
+	for op in range(8):
+		_, mats, _, clamps = runMatrix(Load + [(0, op, 0, 1, 0, 0)], Inputs)
+
+		assert np.allclose(mats[1], expected[op]), op
+		assert np.array_equal(mats[0], P)
+		assert clamps == 0
+
+"""
+Each reduction of register 0 (P) into the shared registers, with register 1 (Q)
+as the other matrix.
+"""
+def test_execute_matrix_shared_operations():
+	expected = [np.sum(Q * P), P.mean(), P.max(), P.min(), np.trace(P),
+		np.sqrt(np.sum((Q - P)**2)), np.argmax(P), P.max() - P.min()]
+	for op in range(8):
+		_, _, shared, _ = runMatrix(Load + [(0, op, 1, 5, 0, 0)], Inputs)
+
+		assert np.isclose(shared[5], expected[op]), op
+		assert np.count_nonzero(shared) == (expected[op] != 0)
+
+"""
+NaN results become 0 and infinities the largest floats, each counted.
+"""
+def test_execute_matrix_clamps():
+	big = np.finfo(np.float64).max
+	inpt = np.full((6, 6), 1e200)
+	inpt[0, 0] = np.nan
+	rows = [(1, 0, 0, 0, 0, 0), # register 0 = the patch at (0, 0), one NaN
+		(0, 2, 0, 0, 0, 0), # squared, 8 infinities
+		(0, 1, 0, 1, 0, 0), # register 1 = -register 0
+		(0, 1, 0, 1, 0, 0), # again, 8 minus infinities
+		(0, 0, 1, 3, 0, 0)] # sum of the elementwise product into shared 3, infinite
+
+	bid, mats, shared, clamps = runMatrix(rows, inpt)
+
+	assert bid == 0
+	assert np.array_equal(mats[0], [[0, big, big], [big, big, big], [big, big, big]])
+	assert np.array_equal(mats[1], [[0, -big, -big], [-big, -big, -big], [-big, -big, -big]])
+	assert shared[3] == -big
+	assert clamps == 1 + 8 + 8 + 1
+
+"""
+insertInstruction and deleteInstruction change the buffer like np.insert and
+np.delete, at every index.
+"""
+def test_insert_and_delete_instructions():
+	rows = np.arange(30, dtype=np.int32).reshape(5, 6)
+	new = np.full(6, -1, dtype=np.int32)
+	for idx in range(len(rows) + 1):
+		buffer = np.zeros((8, 6), dtype=np.int32)
+		buffer[:len(rows)] = rows
+		Program.insertInstruction(buffer, len(rows), idx, new)
+		assert np.array_equal(buffer[:len(rows)+1], np.insert(rows, idx, new, axis=0))
+	for idx in range(len(rows)):
+		buffer = rows.copy()
+		Program.deleteInstruction(buffer, len(rows), idx)
+		assert np.array_equal(buffer[:len(rows)-1], np.delete(rows, idx, axis=0))
+
+"""
+True if the rows of part appear in whole in the same order.
+"""
+def isSubsequence(part, whole):
+	rows = iter(map(tuple, whole.tolist()))
+	return all(row in rows for row in map(tuple, part.tolist()))
+
+"""
+A copied program shares the read only instructions until mutated, then grows
+(past its spare rows) and shrinks its own buffer, leaving the original as it was
+and its instructions read only.
+"""
+def test_mutation_copies_on_write():
+	Trainer(range(10), 10, sourceRange=784, version=2) # configures the classes
+	original = Program(np.arange(30).reshape(5, 6))
+	rows = original.instructions.copy()
+	program = original.copy()
+	assert not original.instructions.flags.writeable
+	assert np.shares_memory(program.instructions, original.instructions)
+
+	for length in range(6, 6 + 2*Program.InstructionSlack):
+		before = program.instructions.copy()
+		program.mutateInstructions(0, 1, 0, 0) # add an instruction
+		assert program.length == length
+		assert isSubsequence(before, program.instructions)
+		assert not program.instructions.flags.writeable
+	assert not np.shares_memory(program.instructions, original.instructions)
+
+	while program.length > 1:
+		before = program.instructions.copy()
+		program.mutateInstructions(1, 0, 0, 0) # delete an instruction
+		assert program.length == len(before) - 1
+		assert isSubsequence(program.instructions, before)
+		assert not program.instructions.flags.writeable
+
+	assert original.length == 5
+	assert np.array_equal(original.instructions, rows)
@@ -0,0 +1,88 @@
+from tpg import rng
+from tpg.trainer import Trainer
+
+"""
+Tests of Trainer's population management, run from the repository root with
+python -m pytest.
+"""
+
+"""
+A small version 2 trainer whose root team referenced is pointed at by a learner
+of another root team, like a team that learners started referencing while it was
+kept as an elite.
+"""
+def makeReferencedElite():
+	trainer = Trainer(range(10), 10, sourceRange=784, version=2)
+	referencing, referenced = trainer.rootTeams[0], trainer.rootTeams[1]
+	learner = referencing.learners[0]
+	learner.action = referenced
+	referenced.numLearnersReferencing += 1
+	return trainer, learner, referenced
+
+"""
+Teams that are no longer elite but that learners reference are kept by select,
+deleting them left the learners pointing at a team outside the population.
+"""
+def test_select_keeps_referenced_former_elites():
+	trainer, learner, referenced = makeReferencedElite()
+	for team in trainer.rootTeams:
+		team.fitness = 1.0
+	referenced.fitness = 0.0 # the worst, first to be deleted
+	trainer.elites = [] # no longer elite
+
+	trainer.select()
+
+	assert referenced in trainer.teams
+	assert learner.action is referenced
+	for lrnr in trainer.learners:
+		if not lrnr.isActionAtomic():
+			assert lrnr.action in trainer.teams
+
+"""
+Pooled agents that are not handed out by getAgents don't keep their last teams
+alive.
+"""
+def test_unused_agents_release_their_teams():
+	trainer = Trainer(range(10), 10, sourceRange=784, version=2)
+	agents = trainer.getAgents()
+	fewer = trainer.getAgents(topK=3)
+
+	assert [agent.team for agent in fewer] == [agent.team for agent in agents[:3]]
+	assert all(agent.team is None for agent in trainer.agentPool[3:])
+
+"""
+select deletes the same root teams as sorting them all by fitness (stably, best
+first) and dropping the last gap of them, with many ties.
+"""
+def test_select_deletes_the_worst_like_a_full_sort():
+	rng.seed(0)
+	trainer = Trainer(range(10), 40, sourceRange=784, version=2)
+	for team in trainer.rootTeams:
+		team.fitness = float(rng.stream.randint(0, 3))
+	trainer.elites = []
+	teams = list(trainer.rootTeams)
+	ranked = sorted(teams, key=lambda team: team.fitness, reverse=True)
+	kept = ranked[:len(ranked) - int(len(ranked)*trainer.gap)]
+
+	trainer.select()
+
+	assert trainer.rootTeams == [team for team in teams if team in kept]
+	assert len(kept) < len(teams)
+
+"""
+rankTeams orders the teams like a stable sort best first, also only the best
+topK, teams without a fitness last.
+"""
+def test_rank_teams_like_a_stable_sort():
+	rng.seed(1)
+	trainer = Trainer(range(10), 30, sourceRange=784, version=2)
+	teams = trainer.rootTeams
+	for team in teams:
+		team.fitness = float(rng.stream.randint(0, 3))
+	teams[4].fitness = None
+	ranked = sorted(range(len(teams)), key=lambda i: -1 if teams[i].fitness is None
+		else teams[i].fitness, reverse=True)
+
+	assert trainer.rankTeams(teams).tolist() == ranked
+	for topK in (0, 1, 7, 29):
+		assert trainer.rankTeams(teams, topK).tolist() == ranked[:topK]
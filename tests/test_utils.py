@@ -0,0 +1,128 @@
+import numpy as np
+
+from tpg.utils import casesByTeam, lexicaseSelect, packCases, paretoFronts, sharedFitness, \
+	teamsByCase, topIndices
+
+"""
+Tests of the selection helpers of tpg.utils, run from the repository root with
+python -m pytest.
+"""
+
+"""
+(teams x cases) random correctness, over more than one 64 bit word of teams and
+of cases.
+"""
+def randomCorrect(seed, numTeams=100, numCases=150):
+	return np.random.default_rng(seed).random((numTeams, numCases)) < 0.5
+
+"""
+lexicaseSelect written out on the unpacked correctness, one event at a time.
+"""
+def lexicaseReference(correct, orders, tieBreaks):
+	selected = []
+	for e, tieBreak in enumerate(tieBreaks):
+		candidates = np.arange(len(correct))
+		for c in orders[e % len(orders)]:
+			passed = candidates[correct[candidates, c]]
+			if len(passed) > 0:
+				candidates = passed
+				if len(candidates) == 1:
+					break
+		selected.append(candidates[int(tieBreak * len(candidates))])
+	return selected
+
+"""
+Lexicase selection on the packed bits picks the same teams as filtering the
+unpacked correctness, with static and dynamic case orders.
+"""
+def test_lexicase_matches_reference():
+	rng = np.random.default_rng(0)
+	correct = randomCorrect(1)
+	caseBits = casesByTeam([packCases(row)[1] for row in correct], correct.shape[1])
+	for numOrders in (1, 100):
+		orders = np.argsort(rng.random((numOrders, correct.shape[1])), axis=1)
+		tieBreaks = rng.random(100)
+
+		selected = lexicaseSelect(caseBits, orders, tieBreaks, len(correct))
+
+		assert selected.tolist() == lexicaseReference(correct, orders, tieBreaks)
+
+"""
+A team that solves every case is selected by every lexicase event.
+"""
+def test_lexicase_selects_the_perfect_team():
+	rng = np.random.default_rng(2)
+	correct = randomCorrect(3)
+	correct[70] = True
+	caseBits = casesByTeam([packCases(row)[1] for row in correct], correct.shape[1])
+	orders = np.argsort(rng.random((100, correct.shape[1])), axis=1)
+
+	selected = lexicaseSelect(caseBits, orders, rng.random(100), len(correct))
+
+	assert np.all(selected == 70)
+
+"""
+Teams that all solve the same cases share their fitness equally, the cases
+solved divided by the number of teams.
+"""
+def test_shared_fitness_of_identical_teams():
+	row = randomCorrect(4, numTeams=1)[0]
+	correct = np.tile(row, (100, 1))
+
+	fitness = sharedFitness(teamsByCase([packCases(row)[1] for row in correct]))
+
+	assert np.allclose(fitness, row.sum() / 100)
+
+"""
+Shared fitness on the packed bits matches the niche counts worked out on the
+unpacked correctness, teams that solved nothing getting 0.
+"""
+def test_shared_fitness_matches_reference():
+	correct = randomCorrect(5)
+	correct[3] = False
+	solved = correct.sum(axis=1).astype(float)
+	common = correct.astype(float) @ correct.T.astype(float)
+	expected = np.zeros(len(correct))
+	expected[solved > 0] = solved[solved > 0]**2 / common.sum(axis=1)[solved > 0]
+
+	fitness = sharedFitness(teamsByCase([packCases(row)[1] for row in correct]))
+
+	assert np.allclose(fitness, expected)
+	assert fitness[3] == 0
+
+"""
+Pareto fronts found by repeatedly taking out the rows no other remaining row
+dominates.
+"""
+def paretoReference(a):
+	fronts = np.full(len(a), -1)
+	remaining = list(range(len(a)))
+	front = 0
+	while remaining:
+		current = [i for i in remaining if not any(np.all(a[j] >= a[i]) and np.any(a[j] > a[i])
+			for j in remaining)]
+		fronts[current] = front
+		remaining = [i for i in remaining if i not in current]
+		front += 1
+	return fronts
+
+"""
+paretoFronts matches the brute-force non-dominated sort, including duplicate
+rows and ties on some of the columns.
+"""
+def test_pareto_fronts_match_reference():
+	rng = np.random.default_rng(6)
+	for numColumns in (1, 2, 3):
+		a = rng.integers(0, 4, (60, numColumns)).astype(float)
+		assert paretoFronts(a).tolist() == paretoReference(a).tolist()
+
+"""
+topIndices picks the same indices as the first k of a stable sort, best first,
+ties included, for every k.
+"""
+def test_top_indices_match_stable_sort():
+	rng = np.random.default_rng(7)
+	for values in (rng.integers(0, 5, 40).astype(float), rng.random(40), np.zeros(40)):
+		ranked = np.argsort(-values, kind='stable')
+		for k in range(-1, len(values) + 2):
+			assert topIndices(values, k).tolist() == sorted(ranked[:max(k, 0)].tolist())
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+"""
+Wall time and call counts of the phases of training (evaluate, score, select,
+generate, nextEpoch, checkpoint, test). main.py adds the totals of each
+generation to the results log and, with --trace, also writes every phase as an
+event in the Chrome trace format, viewable in chrome://tracing or Perfetto.
+"""
+
+"""
+Accumulates the time spent in named phases, used as:
+
+	timer = PhaseTimer()
+	with timer.phase('select'):
+		...
+	results.append(gen=gen, **timer.generationStats())
+"""
+class PhaseTimer:
+
+	def __init__(self, trace=False):
+		self.times = {} # phase name -> seconds since generationStats
+		self.calls = {} # phase name -> calls since generationStats
+		self.events = [] if trace else None # chrome trace events of the whole run
+		self.origin = time.perf_counter()
+
+	"""
+	Times the body of the with statement as the phase name, phases can nest.
+	"""
+	@contextmanager
+	def phase(self, name):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			end = time.perf_counter()
+			self.times[name] = self.times.get(name, 0) + end - start
+			self.calls[name] = self.calls.get(name, 0) + 1
+			if self.events is not None:
+				self.events.append({'name': name, 'ph': 'X', 'pid': os.getpid(),
+					'tid': threading.get_ident(), 'ts': (start - self.origin) * 1e6,
+					'dur': (end - start) * 1e6})
+
+	"""
+	The time (nameTime, seconds) and calls (nameCalls) of each phase since the
+	last call, for the results log.
+	"""
+	def generationStats(self):
+		stats = {}
+		for name in self.times:
+			stats[name + 'Time'] = self.times[name]
+			stats[name + 'Calls'] = self.calls[name]
+		self.times = {}
+		self.calls = {}
+		return stats
+
+	"""
+	Adds an instant event to the trace, e.g. the start of a generation.
+	"""
+	def mark(self, name):
+		if self.events is not None:
+			self.events.append({'name': name, 'ph': 'i', 's': 'p', 'pid': os.getpid(),
+				'tid': threading.get_ident(), 'ts': (time.perf_counter() - self.origin) * 1e6})
+
+	"""
+	Writes the events so far as a Chrome trace json file.
+	"""
+	def writeTrace(self, path):
+		tmpPath = path + '.tmp'
+		with open(tmpPath, 'w') as f:
+			json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+		os.replace(tmpPath, path)
@@ -0,0 +1,116 @@
+import pickle
+
+import numpy as np
+
+from tpg.program import Program
+from tpg.utils import packCases
+
+"""
+Simplified wrapper around a (root) team for easier interface for user.
+"""
+class Agent:
+
+	# shared registers, groups of registers (see Learner.shareIndex) x registers
+	SharedRegisterGroups = 8
+	SharedRegisterCounts = 8
+
+	"""
+	Create an agent with a team. sharedMemory is its shared registers, e.g. a
+	slot of a memoryArena, fresh ones (newMemory) if not given.
+	"""
+	def __init__(self, team, num=1, sharedMemory=None):
+		self.team = team
+		self.agentNum = num
+		self.sharedMemory = Agent.newMemory() if sharedMemory is None else sharedMemory
+
+	"""
+	Reuses the agent for another team (see Trainer.getAgents), with its shared
+	registers cleared like a new agent's.
+	"""
+	def bind(self, team, num):
+		self.team = team
+		self.agentNum = num
+		self.reset()
+
+	def reset(self):
+		if self.sharedMemory is not None:
+			self.sharedMemory.fill(0)
+
+	"""
+	Fresh shared registers for an agent, None if the version has none.
+	"""
+	@staticmethod
+	def newMemory():
+		from tpg.backends import getBackend # imports this module
+		if not getBackend().sharedRegisters:
+			return None
+		return np.zeros((Agent.SharedRegisterGroups, Agent.SharedRegisterCounts))
+
+	"""
+	Shared registers for count agents in one block, agent i using arena[i]. None
+	if the version has none.
+	"""
+	@staticmethod
+	def memoryArena(count):
+		from tpg.backends import getBackend # imports this module
+		if not getBackend().sharedRegisters:
+			return None
+		return np.zeros((count, Agent.SharedRegisterGroups, Agent.SharedRegisterCounts))
+
+	"""
+	Gets an action from the root team of this agent / this agent.
+	"""
+	def act(self, state):
+		return self.team.act(state, self.sharedMemory, set())
+	
+	def act_regression(self, state):
+		_ = self.team.act(state, self.sharedMemory, set())
+		return self.sharedMemory[0][0]
+
+	"""
+	Same as act, but with additional features. Use act for performance.
+	stateIdx is the index of state in the dataset given to Trainer.evolve as
+	stateData, for the mutation uniqueness test (uniqueProgThresh).
+	"""
+	def act2(self, state, stateIdx):
+		return self.team.act2(state, self.sharedMemory, stateIdx, set())
+
+	"""
+	Give this agent/root team a reward for the given task. cases optionally gives
+	the result (True if solved) of each case of the task, e.g. each training
+	sample, used by lexicase selection.
+	"""
+	def reward(self, score, task='task', cases=None):
+		self.team.outcomes[task] = score
+		if cases is not None:
+			self.team.caseOutcomes[task] = packCases(cases)
+
+	"""
+	Check if agent completed this task already, to skip.
+	"""
+	def taskDone(self, task):
+		return task in self.team.outcomes
+
+	"""
+	Save the agent to the file, saving any relevant class values to the instance.
+	"""
+	def saveToFile(self, fileName):
+		self.version = Program.version
+		self.operationRange = Program.operationRange
+		self.destinationRange = Program.destinationRange
+		self.sourceRange = Program.sourceRange
+
+		pickle.dump(self, open(fileName, 'wb'))
+
+"""
+Load some agent from the file, returning it and repopulate class values.
+"""
+def loadAgent(fileName):
+	agent = pickle.load(open(fileName, 'rb'))
+
+	Program.version = getattr(agent, 'version', Program.version)
+	Program.operationRange = agent.operationRange
+	Program.destinationRange = agent.destinationRange
+	Program.sourceRange = agent.sourceRange
+
+	return agent
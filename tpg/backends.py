@@ -0,0 +1,324 @@
+import numpy as np
+
+from tpg.agent import Agent
+from tpg.program import Program
+from tpg.rng import stream
+from tpg.utils import flip, ndim_grid
+
+"""
+How the programs of each TPG version are executed. The teams, learners and the
+trainer are the same for every version, a backend only decides what a learner
+keeps besides its program and action, what input and registers its program runs
+on, and what else can be mutated. The backend in use is Backends[Program.version],
+set by the Trainer (main.py --version).
+
+	1 ScalarBackend: scalar registers kept between bids, no shared registers.
+	2 SharedBackend: fresh registers each bid plus the agent's shared registers.
+	3 VectorBackend: shared, with scalar, vector or matrix programs per learner.
+	4 SubObservationBackend: shared, on a small window of the observation.
+	5 MultiKernelBackend: shared, on several windows of the observation.
+"""
+
+"""
+Version 1, each learner owns registers that persist between bids.
+"""
+class ScalarBackend:
+
+	sharedRegisters = False # whether agents have shared registers (Agent.sharedMemory)
+	persistentRegisters = True # whether learner registers are kept between bids (and saved)
+
+	"""
+	Sets up the version specific attributes of a new learner.
+	"""
+	@staticmethod
+	def initLearner(learner, numRegisters):
+		learner.registers = np.zeros(numRegisters, dtype=float)
+
+	"""
+	Sets up the version specific attributes of a learner copied from original.
+	"""
+	@staticmethod
+	def copyLearner(learner, original):
+		learner.registers = np.zeros(len(original.registers), dtype=float)
+
+	"""
+	Sets up the version specific attributes of a learner loaded from a
+	checkpoint that are not stored, fresh registers of Program.destinationRange
+	(Trainer registerSize). Persistent registers are restored after this.
+	"""
+	@staticmethod
+	def restoreLearner(learner):
+		learner.registers = np.zeros(Program.destinationRange, dtype=float)
+
+	"""
+	The learner's bid on the state, memory is the agent's shared registers.
+	"""
+	@staticmethod
+	def bid(learner, state, memory):
+		ins = learner.program.instructions
+		Program.execute_scalar(state, learner.registers,
+						ins[:,0], ins[:,1], ins[:,2], ins[:,3], Program.clamps)
+		return learner.registers[0]
+
+	"""
+	The output of the learner's program on the input from clean registers, for
+	the mutation uniqueness check.
+	"""
+	@staticmethod
+	def output(learner, inpt):
+		ins = learner.program.instructions
+		regs = np.zeros(len(learner.registers))
+		Program.execute_scalar(inpt, regs, ins[:,0], ins[:,1], ins[:,2], ins[:,3], Program.clamps)
+		return regs[0]
+
+	"""
+	Mutates the version specific attributes, returns True if anything changed.
+	"""
+	@staticmethod
+	def mutateLearner(learner, pMutProg, pMutAct):
+		return False
+
+"""
+Version 2, registers are cleared for each bid and programs can also use the
+agent's shared registers, learners read and write the group at shareIndex.
+"""
+class SharedBackend(ScalarBackend):
+
+	sharedRegisters = True
+	persistentRegisters = False # cleared for each bid
+
+	@classmethod
+	def initLearner(cls, learner, numRegisters):
+		learner.registers = np.zeros(numRegisters, dtype=float)
+		learner.shareIndex = stream.randint(0, Agent.SharedRegisterGroups-1)
+
+	@classmethod
+	def copyLearner(cls, learner, original):
+		learner.registers = np.zeros(len(original.registers), dtype=float)
+		learner.shareIndex = original.shareIndex
+
+	@classmethod
+	def bid(cls, learner, state, memory):
+		learner.registers.fill(0)
+		return cls.execute(learner, cls.observation(learner, state),
+						learner.registers, memory)
+
+	@classmethod
+	def output(cls, learner, inpt):
+		return cls.execute(learner, cls.observation(learner, inpt),
+						np.zeros(len(learner.registers)), Agent.newMemory())
+
+	"""
+	The part of the state the learner's program sees.
+	"""
+	@staticmethod
+	def observation(learner, state):
+		return state
+
+	@staticmethod
+	def execute(learner, inpt, regs, memory):
+		ins = learner.program.instructions
+		Program.execute_shared(inpt, regs,
+						ins[:,0], ins[:,1], ins[:,2], ins[:,3], ins[:,4], ins[:,5],
+						memory, learner.shareIndex, Program.clamps)
+		return regs[0]
+
+	@classmethod
+	def mutateLearner(cls, learner, pMutProg, pMutAct):
+		if flip(pMutAct):
+			cls.mutateShareIndex(learner)
+			return True
+		return False
+
+	"""
+	Moves the learner to a different group of shared registers.
+	"""
+	@staticmethod
+	def mutateShareIndex(learner):
+		newIdx = stream.randint(0, Agent.SharedRegisterGroups-2)
+		learner.shareIndex = newIdx if newIdx < learner.shareIndex else newIdx + 1
+
+"""
+Version 3, shared registers with each learner running its program as scalar,
+vector or matrix instructions (Learner.mode, see Learner.NumberOfModes).
+Registers are made fresh for each bid.
+"""
+class VectorBackend(SharedBackend):
+
+	# mode 0 registers by size, reused by every bid
+	registerWorkspaces = {}
+
+	@staticmethod
+	def initLearner(learner, numRegisters):
+		Learner = type(learner) # class level settings
+		learner.numRegisters = numRegisters
+		learner.shareIndex = stream.randint(0, Agent.SharedRegisterGroups-1)
+		learner.mode = stream.randint(0, Learner.NumberOfModes-1)
+
+	@staticmethod
+	def copyLearner(learner, original):
+		learner.numRegisters = original.numRegisters
+		learner.shareIndex = original.shareIndex
+		learner.mode = original.mode
+
+	# registers are made for each bid
+	@staticmethod
+	def restoreLearner(learner):
+		pass
+
+	@classmethod
+	def bid(cls, learner, state, memory):
+		ins = learner.program.instructions
+		if learner.mode == 0:
+			regs = cls.registerWorkspaces.get(learner.numRegisters)
+			if regs is None:
+				regs = np.zeros(learner.numRegisters, dtype=np.float32)
+				cls.registerWorkspaces[learner.numRegisters] = regs
+			regs.fill(0)
+			return cls.execute(learner, state, regs, memory)
+		elif learner.mode == 1:
+			vecs, src = Program.vectorWorkspace(learner.numRegisters)
+			return Program.execute_vector(state, Program.sourceDims, vecs, src,
+							ins[:,0], ins[:,1], ins[:,2], ins[:,3], ins[:,4], ins[:,5],
+							memory, learner.shareIndex, Program.xShift, Program.yMask, Program.clamps)
+		else:
+			mats, src, tmp = Program.matrixWorkspace(learner.numRegisters)
+			return Program.execute_matrix(state, Program.sourceDims, mats, src, tmp,
+							ins[:,0], ins[:,1], ins[:,2], ins[:,3], ins[:,4], ins[:,5],
+							memory, learner.shareIndex, Program.xShift, Program.yMask, Program.clamps)
+
+	@classmethod
+	def output(cls, learner, inpt):
+		return cls.bid(learner, inpt, Agent.newMemory())
+
+	@classmethod
+	def mutateLearner(cls, learner, pMutProg, pMutAct):
+		Learner = type(learner) # class level settings
+		changed = False
+		if flip(pMutProg):
+			changed = True
+			learner.mode = (learner.mode + 1) % Learner.NumberOfModes
+		if flip(pMutAct):
+			changed = True
+			cls.mutateShareIndex(learner)
+		return changed
+
+"""
+Version 4, shared registers with each learner's program only seeing a
+Learner.SourceKernelSize wide window of the observation starting at obsSrc, which
+mutation moves around.
+"""
+class SubObservationBackend(SharedBackend):
+
+	@classmethod
+	def initLearner(cls, learner, numRegisters):
+		Learner = type(learner) # class level settings
+		super().initLearner(learner, numRegisters)
+		learner.obsSrc = np.zeros(len(Learner.SourceDimensions), dtype=np.int32)
+		for idx in range(len(Learner.SourceDimensions)):
+			learner.obsSrc[idx] = stream.randint(0,
+				Learner.SourceDimensions[idx] - Learner.SourceKernelSize - 1)
+
+	@classmethod
+	def copyLearner(cls, learner, original):
+		super().copyLearner(learner, original)
+		learner.obsSrc = original.obsSrc
+
+	@staticmethod
+	def observation(learner, state):
+		Learner = type(learner) # class level settings
+		# the window starts at obsSrc (its top left corner), not centred on it
+		return state[tuple(slice(idl, idl+Learner.SourceKernelSize) for idl in learner.obsSrc)]
+
+	@classmethod
+	def mutateLearner(cls, learner, pMutProg, pMutAct):
+		Learner = type(learner) # class level settings
+		changed = super().mutateLearner(learner, pMutProg, pMutAct)
+		if flip(pMutAct):
+			changed = True
+			posShift = stream.integers(-1, 1, len(Learner.SourceDimensions))
+			while np.count_nonzero(posShift) == 0:
+				posShift = stream.integers(-1, 1, len(Learner.SourceDimensions))
+			learner.obsSrc = np.mod(posShift + learner.obsSrc,
+				Learner.SourceDimensions).astype(np.int32) # as initLearner makes it
+		return changed
+
+"""
+Version 5, like version 4 but with Learner.SourceKernelPoints windows (obsSrcs),
+the program sees the points of all of them (obsSlc).
+"""
+class MultiKernelBackend(SharedBackend):
+
+	@classmethod
+	def initLearner(cls, learner, numRegisters):
+		Learner = type(learner) # class level settings
+		super().initLearner(learner, numRegisters)
+
+		# Get the corner points for each sub-observation
+		tempSrcs = []
+		for _ in range(Learner.SourceKernelPoints):
+			tempSrcs.append(stream.integers(0, Learner.SourceDimensions - Learner.SourceKernelSize,
+				len(Learner.SourceDimensions)))
+		learner.obsSrcs = np.asarray(tempSrcs)
+
+		# Generate slice object for the learner
+		cls.generateSliceArray(learner)
+
+	@classmethod
+	def copyLearner(cls, learner, original):
+		super().copyLearner(learner, original)
+		# shared until mutated, see mutateLearner
+		learner.obsSrcs = original.obsSrcs
+		learner.obsSlc = original.obsSlc
+
+	"""
+	Points of the observation the learner's program sees, from obsSrcs.
+	"""
+	@staticmethod
+	def generateSliceArray(learner):
+		Learner = type(learner) # class level settings
+		tempSlcs = np.asarray(learner.obsSrcs)
+		if len(learner.obsSrcs) > 1:
+			for idx in range(1, len(learner.obsSrcs)):
+				tempSlcs = np.concatenate((tempSlcs, ndim_grid(learner.obsSrcs[idx],
+					learner.obsSrcs[idx] + Learner.SourceKernelSize)))
+		learner.obsSlc = np.asarray(tempSlcs)
+
+	@staticmethod
+	def observation(learner, state):
+		return state[learner.obsSlc]
+
+	@classmethod
+	def mutateLearner(cls, learner, pMutProg, pMutAct):
+		Learner = type(learner) # class level settings
+		changed = super().mutateLearner(learner, pMutProg, pMutAct)
+		if flip(pMutAct):
+			changed = True
+			# obsSrcs/obsSlc are shared with the learner this was copied from,
+			# so they are replaced rather than changed in place
+			obsSrcs = np.array(learner.obsSrcs)
+			for idx in range(len(obsSrcs)):
+				posShift = stream.integers(-Learner.KernelStepSize, Learner.KernelStepSize,
+					len(Learner.SourceDimensions))
+				while np.count_nonzero(posShift) == 0:
+					posShift = stream.integers(-Learner.KernelStepSize, Learner.KernelStepSize,
+						len(Learner.SourceDimensions))
+				obsSrcs[idx] = np.mod(posShift + obsSrcs[idx], Learner.SourceDimensions)
+			learner.obsSrcs = obsSrcs
+			cls.generateSliceArray(learner)
+		return changed
+
+# main.py --version -> backend
+Backends = {
+	1: ScalarBackend,
+	2: SharedBackend,
+	3: VectorBackend,
+	4: SubObservationBackend,
+	5: MultiKernelBackend,
+}
+
+"""
+The backend of the current Program.version.
+"""
+def getBackend():
+	return Backends[Program.version]
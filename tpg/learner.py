@@ -0,0 +1,179 @@
+from tpg.program import Program
+from tpg.backends import Backends
+import numpy as np
+from tpg.utils import flip
+from tpg.rng import stream
+
+"""
+A team has multiple learners, each learner has a program which is executed to
+produce the bid value for this learner's action. What else a learner holds
+(registers, shared register group, mode, sub-observation) depends on the
+version's backend, see tpg.backends.
+"""
+class Learner:
+
+	idCount = 0 # unique learner id
+	NumberOfModes = 3 # scalar, vector, matrix (version 3)
+	# sub-observations (versions 4 and 5)
+	SourceDimensions = np.asarray([28,28])
+	SourceKernelSize = 3
+	SourceKernelPoints = 2
+	KernelStepSize = 1
+	MaxOverlap = 4
+	MaxSavedStates = 50 # size of the ring buffer of saveState
+
+	"""
+	Create a new learner, either copied from the original or from a program or
+	action. Either requires a learner, or a program/action pair.
+	"""
+	def __init__(self, learner=None, program=None, action=None, numRegisters=8):
+		backend = Backends[Program.version]
+		if learner is not None:
+			# shares the instructions until mutated (copy on write)
+			self.program = learner.program.copy()
+			self.action = learner.action
+			backend.copyLearner(self, learner)
+		elif program is not None and action is not None:
+			self.program = program
+			self.action = action
+			backend.initLearner(self, numRegisters)
+
+		if not self.isActionAtomic():
+			self.action.numLearnersReferencing += 1
+
+		self.clearStates()
+
+		self.numTeamsReferencing = 0 # amount of teams with references to this
+
+		self.id = Learner.idCount
+		Learner.idCount += 1
+
+	"""
+	Get the bid value, highest gets its action selected. memory is the agent's
+	shared registers (None in version 1).
+	"""
+	def bid(self, state, memory):
+		if Program.profiler is not None:
+			Program.profiler.record(self)
+		return Backends[Program.version].bid(self, state, memory)
+
+	"""
+	Output of the program on the input from a clean start, what mutation
+	compares for uniqueness.
+	"""
+	def output(self, inpt):
+		return Backends[Program.version].output(self, inpt)
+
+	"""
+	Recomputes the observation points from obsSrcs (version 5).
+	"""
+	def generateSliceArray(self):
+		Backends[Program.version].generateSliceArray(self)
+
+	"""
+	Returns the action of this learner, either atomic, or requests the action
+	from the action team.
+	"""
+	def getAction(self, state, memory, visited):
+		if self.isActionAtomic():
+			return self.action
+		else:
+			return self.action.act(state, memory, visited)
+
+
+	"""
+	Returns true if the action is atomic, otherwise the action is a team.
+	"""
+	def isActionAtomic(self):
+		return isinstance(self.action, (int, list))
+
+	"""
+	Mutates either the program or the action or both.
+	"""
+	def mutate(self, pMutProg, pMutAct, pActAtom, atomics, parentTeam, allTeams,
+				pDelInst, pAddInst, pSwpInst, pMutInst,
+				multiActs, pSwapMultiAct, pChangeMultiAct,
+				uniqueProgThresh, archive=None):
+
+		changed = False
+		while not changed:
+			# mutate the program
+			if flip(pMutProg):
+				changed = True
+				self.program.mutate(pMutProg, pDelInst, pAddInst, pSwpInst, pMutInst,
+					uniqueProgThresh, archive=archive, output=self.output)
+
+			# mutate the action
+			if flip(pMutAct):
+				changed = True
+				self.mutateAction(pActAtom, atomics, allTeams, parentTeam,
+								  multiActs, pSwapMultiAct, pChangeMultiAct)
+
+			# mutate what the version adds (shared register group, mode, ...)
+			if Backends[Program.version].mutateLearner(self, pMutProg, pMutAct):
+				changed = True
+
+	"""
+	Changes the action, into an atomic or team.
+	"""
+	def mutateAction(self, pActAtom, atomics, allTeams, parentTeam,
+					 multiActs, pSwapMultiAct, pChangeMultiAct):
+		if not self.isActionAtomic(): # dereference old team action
+			self.action.numLearnersReferencing -= 1
+
+		if flip(pActAtom): # atomic action
+			if multiActs is None:
+				self.action = stream.choice(
+								[a for a in atomics if a is not self.action])
+			else:
+				swap = flip(pSwapMultiAct)
+				if swap or not self.isActionAtomic(): # totally swap action for another
+					self.action = list(stream.choice(multiActs))
+
+				# change some value in action, a copy as it may be the original's
+				if not swap or flip(pChangeMultiAct):
+					self.action = list(self.action)
+					changed = False
+					while not changed or flip(pChangeMultiAct):
+						index = stream.randint(0, len(self.action)-1)
+						self.action[index] += stream.gauss(0, .15)
+						self.action = list(np.clip(self.action, 0, 1))
+						changed = True
+
+		else: # Team action
+			self.action = stream.choice([t for t in allTeams
+					if t is not self.action and t is not parentTeam])
+
+		if not self.isActionAtomic(): # add reference for new team action
+			self.action.numLearnersReferencing += 1
+
+	"""
+	Saves a visited state for mutation uniqueness purposes, as its index in the
+	dataset (see Trainer.getLearnersArchive). Only the last MaxSavedStates are
+	kept, in a ring buffer made on the first save.
+	"""
+	def saveState(self, stateIdx):
+		if self.states is None:
+			self.states = np.empty(Learner.MaxSavedStates, dtype=np.int32)
+		self.states[self.numSavedStates % len(self.states)] = stateIdx
+		self.numSavedStates += 1
+
+	"""
+	Indices of the saved states, in no particular order.
+	"""
+	def savedStates(self):
+		if self.states is None:
+			return np.empty(0, dtype=np.int32)
+		return self.states[:min(self.numSavedStates, len(self.states))]
+
+	def clearStates(self):
+		self.states = None
+		self.numSavedStates = 0
+
+	"""
+	Older pickles saved the states themselves in a list, they are dropped.
+	"""
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		if isinstance(self.states, list):
+			self.clearStates()
@@ -0,0 +1,101 @@
+import numpy as np
+
+from tpg.program import Program
+
+"""
+Opt-in profiling of the programs that are executed. Set Program.profiler to a
+ProgramProfiler and every Learner.bid is recorded (main.py --profile):
+
+	profiler = ProgramProfiler()
+	Program.profiler = profiler
+	... training ...
+	stats = profiler.generationStats() # and starts counting again
+
+Programs run every instruction once (there are no jumps), so the counts per
+operation and per source come from the instructions of each bid program rather
+than from inside the kernels, which only count the NaN/inf results they clean
+up (Program.clamps). Only bids in this process are seen, not in worker
+processes, so main.py refuses --profile with more than one worker.
+"""
+
+# kernels a program can run on, see tpg.backends (Learner.mode in version 3)
+Kernels = ('scalar', 'vector', 'matrix')
+
+# names of the operations of each kernel, by share destination bit then operation
+OperationNames = {
+	'scalar': (('add', 'sub', 'mul', 'div', 'log', 'exp', 'sin', 'neg'),
+			('sharedAdd', 'sharedSub', 'sharedMul', 'sharedDiv',
+			 'sharedLog', 'sharedExp', 'sharedSin', 'sharedNeg')),
+	'vector': (('add', 'sub', 'mul', 'div', 'neg', 'exp', 'cos', 'tanh'),
+			('dot', 'cosine', 'distance', 'argmax', 'argmin', 'mean', 'min', 'max')),
+	'matrix': (('add', 'sub', 'hadamard', 'matmul', 'transpose', 'convolve', 'maxpool', 'tanh'),
+			('sumProduct', 'mean', 'max', 'min', 'trace', 'distance', 'argmax', 'contrast')),
+}
+
+# where an instruction reads its source from
+Sources = ('register', 'input', 'shared')
+
+"""
+Counts of the operations, sources and clamps of the programs run.
+"""
+class ProgramProfiler:
+
+	def __init__(self):
+		self.reset()
+
+	"""
+	Clears the counts.
+	"""
+	def reset(self):
+		self.executions = 0 # programs run
+		self.instructions = 0 # instructions run
+		# [kernel, share destination, operation]
+		self.operations = np.zeros((len(Kernels), 2, 8), dtype=np.int64)
+		self.sources = np.zeros(len(Sources), dtype=np.int64)
+		self.clampStart = int(Program.clamps[0])
+
+	"""
+	Records one execution of the learner's program.
+	"""
+	def record(self, learner):
+		ins = learner.program.instructions
+		kernel = getattr(learner, 'mode', 0)
+		self.executions += 1
+		self.instructions += len(ins)
+
+		if Program.version == 1:
+			dshrs = np.zeros(len(ins), dtype=np.int64)
+			ops = ins[:,1]
+			sources = ins[:,0] # 0 register, 1 input
+		else:
+			dshrs = ins[:,2]
+			ops = ins[:,1]
+			sources = ins[:,0].astype(np.int64)
+			if kernel == 0: # registers or shared registers
+				sources[(sources == 0) & (ins[:,4] == 1)] = 2
+
+		self.operations[kernel] += np.bincount(dshrs*8 + ops, minlength=16).reshape(2, 8)
+		self.sources += np.bincount(sources, minlength=len(Sources))
+
+	"""
+	The counts since the last call, for the results log, then starts again.
+	Operations are named kernel.operation and only those that ran are listed.
+	"""
+	def generationStats(self):
+		operations = {}
+		for k, kernel in enumerate(Kernels):
+			for shr in range(2):
+				for op in range(8):
+					if self.operations[k, shr, op] > 0:
+						name = kernel + '.' + OperationNames[kernel][shr][op]
+						operations[name] = int(self.operations[k, shr, op])
+
+		stats = {
+			'profileExecutions': self.executions,
+			'profileInstructions': self.instructions,
+			'profileClamps': int(Program.clamps[0]) - self.clampStart,
+			'profileOperations': operations,
+			'profileSources': {source: int(count) for source, count in zip(Sources, self.sources)},
+		}
+		self.reset()
+		return stats
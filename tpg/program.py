@@ -0,0 +1,637 @@
+import numpy as np
+from numba import njit
+import math
+from tpg.rng import stream
+from tpg.utils import flip, clamp, divide, norm
+
+# execute_vector/execute_matrix buffers, see Program.vectorWorkspace/matrixWorkspace
+_vectorWorkspaces = {}
+_matrixWorkspaces = {}
+
+"""
+A program that is executed to help obtain the bid for a learner. The kernels
+for every version's instructions live here, tpg.backends decides which one a
+learner's program runs on.
+"""
+class Program:
+
+	# which TPG version (see tpg.backends) the programs are made for and run as
+	version = 1
+	# operation is some math or memory operation
+	operationRange = 8 # 8 if memory
+	# destination is the register to store result in for each instruction
+	destinationRange = 8 # or however many registers there are
+	# the source index of the registers or observation
+	sourceRange = 784 # should be equal to input size (or larger if varies)
+	sourceDims = (28,28) # should be equal to input dimensions (or larger if varies)
+	# bits of the source index used for the x and y coordinates of vector/matrix reads
+	xShift = 0
+	yMask = 0
+	matrixSize = 4 # side of the square matrix registers and input patches
+	# count of NaN/inf results cleaned up by the kernels, passed to each of them
+	clamps = np.zeros(1, dtype=np.int64)
+	# if set, a tpg.profiler.ProgramProfiler recording every bid
+	profiler = None
+
+	idCount = 0 # unique id of each program
+	# spare rows a program's instruction buffer gets when it is first mutated
+	InstructionSlack = 16
+
+	"""
+	The instructions are the first length rows of buffer, the rest is spare
+	capacity so mutation can insert and delete in place. The buffer is read only
+	except while mutateInstructions changes it, so programs can share it (see
+	copy) and a program only copies it when first mutated (copy on write).
+	"""
+	def __init__(self, instructions=None, maxProgramLength=128):
+		if instructions is None: # create random new
+			instructions = np.array([Program.randomInstruction()
+				for _ in range(stream.randint(1, maxProgramLength))], dtype=np.int32)
+		self.instructions = instructions
+
+		self.id = Program.idCount
+		Program.idCount += 1
+
+	"""
+	The live instructions, a read only view of the buffer.
+	"""
+	@property
+	def instructions(self):
+		return self.buffer[:self.length]
+
+	"""
+	Replaces the instructions, read only arrays are shared and others copied.
+	"""
+	@instructions.setter
+	def instructions(self, instructions):
+		instructions = np.asarray(instructions, dtype=np.int32)
+		if instructions.flags.writeable:
+			instructions = instructions.copy()
+			instructions.flags.writeable = False
+		self.buffer = instructions
+		self.length = len(instructions)
+		self.ownsBuffer = False # mutateInstructions copies it first
+
+	"""
+	A new program sharing this one's instructions until either is mutated.
+	"""
+	def copy(self):
+		self.ownsBuffer = False # shared from now on
+		program = Program.__new__(Program)
+		program.buffer = self.buffer
+		program.length = self.length
+		program.ownsBuffer = False
+		program.id = Program.idCount
+		Program.idCount += 1
+		return program
+
+	"""
+	Only the live instructions are pickled, without the spare capacity.
+	"""
+	def __getstate__(self):
+		return {'instructions': np.array(self.instructions), 'id': self.id}
+
+	def __setstate__(self, state):
+		self.id = state['id']
+		self.instructions = state['instructions']
+
+	"""
+	The largest value of each part of an instruction. Version 1 instructions are
+	(mode, operation, destination, source), the later versions add a share bit
+	before the destination and the source:
+	(mode, operation, share destination, destination, share source, source).
+	"""
+	@staticmethod
+	def instructionRanges():
+		if Program.version == 1:
+			return (1, Program.operationRange-1, Program.destinationRange-1,
+					Program.sourceRange-1)
+		return (1, Program.operationRange-1, 1, Program.destinationRange-1,
+				1, Program.sourceRange-1)
+
+	"""
+	A new random instruction for the current version.
+	"""
+	@staticmethod
+	def randomInstruction():
+		return tuple(stream.randint(0, maxVal) for maxVal in Program.instructionRanges())
+
+	"""
+	A numpy Generator for drawing many instructions at once, seeded from the
+	stream so seeding it (tpg.rng.seed) also fixes what is drawn.
+	"""
+	@staticmethod
+	def generator():
+		return stream.generator()
+
+	"""
+	Programs on consecutive rows of a block of instructions, offsets[i] to
+	offsets[i+1] for the i-th. They all share the block, which is made read only.
+	"""
+	@staticmethod
+	def fromBlock(block, offsets):
+		block.flags.writeable = False
+		return [Program(instructions=block[start:end])
+			for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+	"""
+	count new random programs of 1 to maxProgramLength instructions, like
+	Program(maxProgramLength=...) but with every instruction of every program
+	drawn at once.
+	"""
+	@staticmethod
+	def randomPrograms(count, maxProgramLength=128, rng=None):
+		rng = Program.generator() if rng is None else rng
+		lengths = rng.integers(1, maxProgramLength, size=count, endpoint=True)
+		offsets = np.concatenate(([0], np.cumsum(lengths)))
+		ranges = np.asarray(Program.instructionRanges())
+		block = rng.integers(0, ranges, size=(offsets[-1], len(ranges)),
+			dtype=np.int32, endpoint=True)
+		return Program.fromBlock(block, offsets)
+
+	"""
+	Executes a scalar program (version 1 instructions: mode, operation,
+	destination, source) on regs, the result is left in regs[0]. Like every
+	kernel it replaces NaN/inf results and counts them in clamps[0].
+	"""
+	@njit
+	def execute_scalar(inpt, regs, modes, ops, dsts, srcs, clamps):
+		inpt = inpt.flatten()
+		regSize = len(regs)
+		inptLen = len(inpt)
+		for i in range(len(modes)):
+			# first get source
+			if modes[i] == 0:
+				src = regs[srcs[i]%regSize]
+			else:
+				src = inpt[srcs[i]%inptLen]
+
+			# get data for operation
+			op = ops[i]
+			x = regs[dsts[i]]
+			y = src
+			dest = dsts[i]%regSize
+
+			# do an operation
+			if op == 0:
+				regs[dest] = x + y
+			elif op == 1:
+				regs[dest] = x - y
+			elif op == 2:
+				regs[dest] = x * y
+			elif op == 3:
+				if y != 0:
+					regs[dest] = x / y
+			elif op == 4:
+				if y > 0:
+					regs[dest] = math.log(y)
+			elif op == 5:
+				regs[dest] = math.exp(y)
+			elif op == 6:
+				regs[dest] = math.sin(y)
+			elif op == 7:
+				regs[dest] *= -1
+
+			if math.isnan(regs[dest]):
+				regs[dest] = 0
+				clamps[0] += 1
+			elif regs[dest] == np.inf:
+				regs[dest] = np.finfo(np.float64).max
+				clamps[0] += 1
+			elif regs[dest] == -np.inf:
+				regs[dest] = np.finfo(np.float64).min
+				clamps[0] += 1
+
+
+	"""
+	Executes a program that can also read and write the shared registers
+	(mode, operation, share destination, destination, share source, source), the
+	result is left in regs[0].
+	"""
+	@njit
+	def execute_shared(inpt, regs, modes, ops, dshrs, dsts, sshrs, srcs, shared, shareIndex, clamps):
+		inpt = inpt.flatten()
+		regSize = len(regs)
+		shrSize = len(shared)
+		shrRegSize = len(shared[0])
+		inptLen = len(inpt)
+		for i in range(len(modes)):
+			# first get source
+			if modes[i] == 0:
+				if sshrs[i] == 1:
+					src = shared[shareIndex%shrSize][srcs[i]%shrRegSize]
+				else:
+					src = regs[srcs[i]%regSize]
+			else:
+				src = inpt[srcs[i]%inptLen]
+
+			# get data for operation
+			op = ops[i]
+			if dshrs[i] == 1:
+				dest = dsts[i]%shrRegSize
+				x = shared[shareIndex][dest]
+			else:
+				dest = dsts[i]%regSize
+				x = regs[dest]
+			y = src
+
+			# do an operation
+			if dshrs[i] == 1:
+				if op == 0:
+					shared[shareIndex][dest] = x + y
+				elif op == 1:
+					shared[shareIndex][dest] = x - y
+				elif op == 2:
+					shared[shareIndex][dest] = x * y
+				elif op == 3:
+					if y != 0:
+						shared[shareIndex][dest] = x / y
+				elif op == 4:
+					if y > 0:
+						shared[shareIndex][dest] = math.log(y)
+				elif op == 5:
+					shared[shareIndex][dest] = math.exp(y)
+				elif op == 6:
+					shared[shareIndex][dest] = math.sin(y)
+				elif op == 7:
+					shared[shareIndex][dest] *= -1
+			else:
+				if op == 0:
+					regs[dest] = x + y
+				elif op == 1:
+					regs[dest] = x - y
+				elif op == 2:
+					regs[dest] = x * y
+				elif op == 3:
+					if y != 0:
+						regs[dest] = x / y
+				elif op == 4:
+					if y > 0:
+						regs[dest] = math.log(y)
+				elif op == 5:
+					regs[dest] = math.exp(y)
+				elif op == 6:
+					regs[dest] = math.sin(y)
+				elif op == 7:
+					regs[dest] *= -1
+
+			if math.isnan(regs[dest]):
+				regs[dest] = 0
+				clamps[0] += 1
+			elif regs[dest] == np.inf:
+				regs[dest] = np.finfo(np.float64).max
+				clamps[0] += 1
+			elif regs[dest] == -np.inf:
+				regs[dest] = np.finfo(np.float64).min
+				clamps[0] += 1
+
+
+	"""
+	Preallocated (vector registers, source vector) buffers for execute_vector
+	with this many registers, made once and reused by every bid.
+	"""
+	@staticmethod
+	def vectorWorkspace(numRegisters):
+		workspace = _vectorWorkspaces.get(numRegisters)
+		if workspace is None:
+			workspace = (np.zeros((numRegisters, numRegisters), dtype=np.float64),
+						 np.zeros(numRegisters, dtype=np.float64))
+			_vectorWorkspaces[numRegisters] = workspace
+		return workspace
+
+	"""
+	Executes the program on vector registers, returns the first element of the
+	first one. vecs (registers x register size) and src (register size) are the
+	buffers from vectorWorkspace, vecs is cleared first and everything is done in
+	place on them so nothing is allocated per instruction.
+	"""
+	@njit
+	def execute_vector(inpt, inptDims, vecs, src, modes, ops, dshrs, dsts, sshrs, srcs, shared, shareIndex, xShift, yMask, clamps):
+		vecs[:] = 0
+		vecNum = vecs.shape[0]
+		vecSize = vecs.shape[1]
+		shrRegSize = len(shared[0])
+		for i in range(len(modes)):
+			# first get source
+			if modes[i] == 0:
+				y = vecs[srcs[i]%vecSize]
+			else:
+				srcX = (srcs[i] >> xShift) % inptDims[1]
+				srcY = (srcs[i] & yMask) % inptDims[0]
+				# Hijacking this variable to choose if we are using a column or row vector
+				if sshrs[i] == 0: # Row
+					n = max(0, min(vecSize, inptDims[1] - srcY))
+					for k in range(n):
+						src[k] = inpt[srcX, srcY + k]
+				else:
+					n = max(0, min(vecSize, inptDims[0] - srcX))
+					for k in range(n):
+						src[k] = inpt[srcX + k, srcY]
+				for k in range(n, vecSize):
+					src[k] = 0
+				y = src
+
+			op = ops[i]
+			# We are going to store results in the private vector registers
+			if dshrs[i] == 0:
+				x = vecs[dsts[i]%vecNum]
+				for k in range(vecSize):
+					if op == 0: # Add
+						value = x[k] + y[k]
+					elif op == 1:
+						value = x[k] - y[k]
+					elif op == 2:
+						value = x[k] * y[k]
+					elif op == 3:
+						value = divide(x[k], y[k])
+					elif op == 4:
+						value = -x[k]
+					elif op == 5:
+						value = math.exp(y[k])
+					elif op == 6:
+						value = math.cos(y[k])
+					else:
+						value = math.tanh(y[k])
+					x[k] = clamp(value, clamps)
+			# We are going to store results in shared registers
+			else:
+				dest = dsts[i]%shrRegSize
+				x = vecs[dest%vecNum]
+				if op == 0: # Inner product
+					value = 0.0
+					for k in range(vecSize):
+						value += x[k] * y[k]
+					shared[shareIndex][dest] = value
+				elif op == 1: # Cosine similarity
+					denom = norm(x, y, False) * norm(y, x, False)
+					if denom != 0:
+						value = 0.0
+						for k in range(vecSize):
+							value += x[k] * y[k]
+						shared[shareIndex][dest] = value / denom
+				elif op == 2: # Euclidian distance
+					shared[shareIndex][dest] = norm(x, y, True)
+				elif op == 3:
+					shared[shareIndex][dest] = np.argmax(y)
+				elif op == 4:
+					shared[shareIndex][dest] = np.argmin(y)
+				elif op == 5:
+					shared[shareIndex][dest] = np.mean(y)
+				elif op == 6:
+					shared[shareIndex][dest] = np.min(y)
+				elif op == 7:
+					shared[shareIndex][dest] = np.max(y)
+				shared[shareIndex][dest] = clamp(shared[shareIndex][dest], clamps)
+		return vecs[0][0]
+
+	"""
+	Preallocated (matrix registers, source patch, scratch) buffers for
+	execute_matrix with this many registers of the current matrixSize.
+	"""
+	@staticmethod
+	def matrixWorkspace(numRegisters):
+		key = (numRegisters, Program.matrixSize)
+		workspace = _matrixWorkspaces.get(key)
+		if workspace is None:
+			size = Program.matrixSize
+			workspace = (np.zeros((numRegisters, size, size), dtype=np.float64),
+						 np.zeros((size, size), dtype=np.float64),
+						 np.zeros((size, size), dtype=np.float64))
+			_matrixWorkspaces[key] = workspace
+		return workspace
+
+	"""
+	Executes the program on square matrix registers, returns the top left element
+	of the first one. Inputs are read as patches at (x, y) of the same size,
+	every other pixel if the share source bit is set, so a patch covers twice
+	the area. Matrix results (shared destination bit clear):
+	0 add, 1 subtract, 2 elementwise multiply, 3 matrix multiply, 4 transpose,
+	5 convolve the source with the destination as kernel (same size, zero
+	padded), 6 2x2 max pooling (stride 1, same size), 7 tanh.
+	Reductions to the shared registers (shared destination bit set):
+	0 sum of elementwise product with the register (one convolution output),
+	1 mean, 2 max, 3 min, 4 trace, 5 distance to the register, 6 argmax,
+	7 max - min.
+	mats, src and tmp are the buffers from matrixWorkspace, mats is cleared
+	first and nothing is allocated.
+	"""
+	@njit
+	def execute_matrix(inpt, inptDims, mats, src, tmp, modes, ops, dshrs, dsts, sshrs, srcs, shared, shareIndex, xShift, yMask, clamps):
+		mats[:] = 0
+		matNum = mats.shape[0]
+		size = mats.shape[1]
+		half = (size - 1) // 2 # kernel centre
+		shrRegSize = len(shared[0])
+		for i in range(len(modes)):
+			# first get source
+			if modes[i] == 0:
+				y = mats[srcs[i]%matNum]
+			else:
+				srcX = (srcs[i] >> xShift) % inptDims[1]
+				srcY = (srcs[i] & yMask) % inptDims[0]
+				stride = 1 + sshrs[i]
+				numRows = min(inptDims[0], inpt.shape[0])
+				numCols = min(inptDims[1], inpt.shape[1])
+				for r in range(size):
+					row = srcX + r*stride
+					for c in range(size):
+						col = srcY + c*stride
+						if row < numRows and col < numCols:
+							src[r, c] = inpt[row, col]
+						else:
+							src[r, c] = 0
+				y = src
+
+			op = ops[i]
+			# We are going to store results in the private matrix registers
+			if dshrs[i] == 0:
+				x = mats[dsts[i]%matNum]
+				if op <= 2 or op == 7: # elementwise, in place
+					for r in range(size):
+						for c in range(size):
+							if op == 0:
+								value = x[r, c] + y[r, c]
+							elif op == 1:
+								value = x[r, c] - y[r, c]
+							elif op == 2:
+								value = x[r, c] * y[r, c]
+							else:
+								value = math.tanh(y[r, c])
+							x[r, c] = clamp(value, clamps)
+				else: # reads neighbours, so into tmp then copied over
+					for r in range(size):
+						for c in range(size):
+							if op == 3: # Matrix multiply
+								value = 0.0
+								for k in range(size):
+									value += x[r, k] * y[k, c]
+							elif op == 4: # Transpose
+								value = y[c, r]
+							elif op == 5: # Convolve, x is the kernel
+								value = 0.0
+								for a in range(size):
+									row = r + a - half
+									if row < 0 or row >= size:
+										continue
+									for b in range(size):
+										col = c + b - half
+										if col >= 0 and col < size:
+											value += x[a, b] * y[row, col]
+							else: # Max pool
+								value = y[r, c]
+								if r+1 < size:
+									value = max(value, y[r+1, c])
+								if c+1 < size:
+									value = max(value, y[r, c+1])
+									if r+1 < size:
+										value = max(value, y[r+1, c+1])
+							tmp[r, c] = clamp(value, clamps)
+					x[:, :] = tmp
+			# We are going to store results in shared registers
+			else:
+				dest = dsts[i]%shrRegSize
+				x = mats[dest%matNum]
+				if op == 0: # Sum of elementwise product
+					value = 0.0
+					for r in range(size):
+						for c in range(size):
+							value += x[r, c] * y[r, c]
+				elif op == 1:
+					value = np.mean(y)
+				elif op == 2:
+					value = np.max(y)
+				elif op == 3:
+					value = np.min(y)
+				elif op == 4: # Trace
+					value = 0.0
+					for k in range(size):
+						value += y[k, k]
+				elif op == 5: # Distance
+					value = 0.0
+					for r in range(size):
+						for c in range(size):
+							value += (x[r, c] - y[r, c])**2
+					value = math.sqrt(value)
+				elif op == 6:
+					value = np.argmax(y)
+				else: # Contrast
+					value = np.max(y) - np.min(y)
+				shared[shareIndex][dest] = clamp(value, clamps)
+		return mats[0][0][0]
+
+	"""
+	Mutates the program, by performing some operations on the instructions. If
+	archive (see Trainer.getLearnersArchive) is not None, then mutates until this
+	program's output differs from every learner's on each of its states,
+	output(state) giving this program's output on a state (see Learner.output).
+	"""
+	def mutate(self, pMutRep, pDelInst, pAddInst, pSwpInst, pMutInst,
+				uniqueProgThresh, archive=None, output=None, maxMuts=100):
+		if archive is not None:
+			states, stateIdx, outputs = archive
+			# mutate until distinct from others
+			unique = False
+			while not unique:
+				if maxMuts <= 0:
+					break # too much
+				maxMuts -= 1
+
+				self.mutateInstructions(pDelInst, pAddInst, pSwpInst, pMutInst)
+
+				# this program on each distinct state once, against every
+				# learner's outputs on its states (NaN padding never matches)
+				newOutputs = np.array([output(state) for state in states], dtype=float)
+				with np.errstate(invalid='ignore', over='ignore'): # outputs can be +-max
+					unique = not np.any(np.abs(outputs - newOutputs[stateIdx]) < uniqueProgThresh)
+		else:
+			# mutations repeatedly, random probably small amount
+			mutated = False
+			while not mutated or flip(pMutRep):
+				self.mutateInstructions(pDelInst, pAddInst, pSwpInst, pMutInst)
+				mutated = True
+
+	"""
+	Potentially modifies the instructions in a few ways, in place in the buffer.
+	"""
+	def mutateInstructions(self, pDel, pAdd, pSwp, pMut):
+		# the buffer may be shared with other programs, change a copy
+		if not self.ownsBuffer:
+			self.reserve(self.length + Program.InstructionSlack)
+		buffer = self.buffer
+		buffer.flags.writeable = True
+		changed = False
+
+		while not changed:
+			# maybe delete instruction
+			if self.length > 1 and flip(pDel):
+				# delete random row/instruction
+				Program.deleteInstruction(buffer, self.length,
+									stream.randint(0, self.length-1))
+				self.length -= 1
+
+				changed = True
+
+			# maybe mutate an instruction (flip a bit)
+			if flip(pMut):
+				# index of instruction and part of instruction
+				idx1 = stream.randint(0, self.length-1)
+				ranges = Program.instructionRanges()
+				idx2 = stream.randint(0, len(ranges)-1)
+
+				# change it, max value depending on part of instruction
+				buffer[idx1, idx2] = stream.randint(0, ranges[idx2])
+
+				changed = True
+
+			# maybe swap two instructions
+			if self.length > 1 and flip(pSwp):
+				# indices to swap
+				idx1, idx2 = stream.pair(self.length)
+
+				# do swap
+				buffer[[idx1, idx2]] = buffer[[idx2, idx1]]
+
+				changed = True
+
+			# maybe add instruction
+			if flip(pAdd):
+				if self.length == len(buffer): # full, double it
+					self.reserve(2 * len(buffer))
+					buffer = self.buffer
+				# insert new random instruction
+				Program.insertInstruction(buffer, self.length,
+						stream.randint(0, self.length),
+						np.array(Program.randomInstruction(), dtype=np.int32))
+				self.length += 1
+				changed = True
+
+		buffer.flags.writeable = False
+
+	"""
+	Moves the instructions into a new writable buffer of this many rows, owned
+	by this program.
+	"""
+	def reserve(self, capacity):
+		buffer = np.empty((capacity, self.buffer.shape[1]), dtype=np.int32)
+		buffer[:self.length] = self.buffer[:self.length]
+		self.buffer = buffer
+		self.ownsBuffer = True
+
+	"""
+	Inserts instruction at idx of the first length rows of buffer, moving the
+	rest down a row. The buffer must have a spare row.
+	"""
+	@njit
+	def insertInstruction(buffer, length, idx, instruction):
+		for i in range(length, idx, -1):
+			buffer[i] = buffer[i-1]
+		buffer[idx] = instruction
+
+	"""
+	Deletes the instruction at idx of the first length rows of buffer, moving
+	the rest up a row.
+	"""
+	@njit
+	def deleteInstruction(buffer, length, idx):
+		for i in range(idx, length-1):
+			buffer[i] = buffer[i+1]
@@ -0,0 +1,146 @@
+import random
+
+import numpy as np
+
+"""
+The random numbers of evolution (coin flips, random indices and choices), served
+from blocks of uniforms drawn ahead by a numpy Generator rather than a call into
+random for each. Everything draws from the one stream of this process:
+
+	from tpg.rng import stream
+	if stream.flip(0.5):
+		idx = stream.randint(0, len(learners)-1)
+
+Seeding (seed) goes through a numpy SeedSequence, which also seeds random and
+np.random for what still uses them, so a run with the same seed evolves the same
+population. Worker processes seed their own stream from a child of the main
+process's sequence (see workerSeed).
+"""
+
+# uniforms drawn at a time
+BlockSize = 4096
+
+"""
+A buffered stream of random numbers from a numpy Generator.
+"""
+class RandomStream:
+
+	def __init__(self, seed=None):
+		self.seed(seed)
+
+	"""
+	Starts again from seed, an int, a SeedSequence or None for fresh entropy.
+	"""
+	def seed(self, seed=None):
+		if not isinstance(seed, np.random.SeedSequence):
+			seed = np.random.SeedSequence(seed)
+		self.seedSequence = seed
+		self.rng = np.random.default_rng(seed)
+		self.block = [] # taken from the end, a list is faster than an array
+
+	"""
+	The state of the stream, to continue from later with setstate (like
+	random.getstate).
+	"""
+	def getstate(self):
+		return (self.seedSequence, self.rng.bit_generator.state, list(self.block))
+
+	def setstate(self, state):
+		seedSequence, generatorState, block = state
+		self.seed(seedSequence)
+		self.rng.bit_generator.state = generatorState
+		self.block = list(block)
+
+	"""
+	A uniform float in [0, 1).
+	"""
+	def random(self):
+		try:
+			return self.block.pop()
+		except IndexError:
+			self.block = self.rng.random(BlockSize).tolist()
+			return self.block.pop()
+
+	"""
+	True with probability prob.
+	"""
+	def flip(self, prob):
+		try:
+			return self.block.pop() < prob
+		except IndexError:
+			return self.random() < prob
+
+	"""
+	A random int from low to high, both included (like random.randint).
+	"""
+	def randint(self, low, high):
+		return low + int(self.random() * (high - low + 1))
+
+	"""
+	A random element of the (non empty) sequence.
+	"""
+	def choice(self, seq):
+		return seq[int(self.random() * len(seq))]
+
+	"""
+	Two different random ints from 0 to n-1 (like random.sample(range(n), 2)).
+	"""
+	def pair(self, n):
+		first = int(self.random() * n)
+		second = int(self.random() * (n - 1))
+		return first, second + 1 if second >= first else second
+
+	"""
+	A normally distributed float.
+	"""
+	def gauss(self, mu, sigma):
+		return self.rng.normal(mu, sigma)
+
+	"""
+	An array of size random ints from low to high-1 (like np.random.randint).
+	"""
+	def integers(self, low, high, size):
+		return self.rng.integers(low, high, size)
+
+	"""
+	An array of size uniform floats in [0, 1), size an int or a shape.
+	"""
+	def uniforms(self, size):
+		return self.rng.random(size)
+
+	"""
+	A random ordering of the ints from 0 to n-1, an array.
+	"""
+	def permutation(self, n):
+		return self.rng.permutation(n)
+
+	"""
+	A new Generator for drawing arrays at once (e.g. Program.randomPrograms),
+	seeded from a child of this stream's sequence.
+	"""
+	def generator(self):
+		return np.random.default_rng(self.seedSequence.spawn(1)[0])
+
+# the stream of this process
+stream = RandomStream()
+
+"""
+Seeds the stream, random and np.random of this process from seed (an int, a
+SeedSequence or None for fresh entropy). Returns the SeedSequence, its entropy
+reproduces the run.
+"""
+def seed(seed=None):
+	if not isinstance(seed, np.random.SeedSequence):
+		seed = np.random.SeedSequence(seed)
+	streamSeed, randomSeed, numpySeed = seed.spawn(3)
+	stream.seed(streamSeed)
+	random.seed(int(randomSeed.generate_state(1, np.uint64)[0]))
+	np.random.seed(numpySeed.generate_state(4))
+	return seed
+
+"""
+The SeedSequence for worker processes, a child of the stream's sequence, for
+init_worker to seed with.
+"""
+def workerSeed():
+	return stream.seedSequence.spawn(1)[0]
@@ -1,6 +1,6 @@
-from tpg_v5.utils import flip
-from tpg_v5.learner import Learner
-import random
+from tpg.utils import flip
+from tpg.learner import Learner
+from tpg.rng import stream
 
 """
 The main building block of TPG. Each team has multiple learning which decide the
@@ -13,15 +13,52 @@ class Team:
 	def __init__(self):
 		self.learners = []
 		self.outcomes = {} # scores at various tasks
+		self.caseOutcomes = {} # packed per-case results at various tasks
 		self.fitness = None
+		self.roots = None # root team set of the trainer, see numLearnersReferencing
 		self.numLearnersReferencing = 0 # number of learners that reference this
 		self.id = Team.idCount
 		Team.idCount += 1
 
 	"""
-	Returns an action to use based on the current state.
+	Number of learners that reference this team. Setting it keeps the trainer's
+	root team set (roots, a dict used as an ordered set) up to date, the team is
+	in it while nothing references it.
 	"""
-	def act(self, state, sharedMem, visited=set(),):
+	@property
+	def numLearnersReferencing(self):
+		return self._numLearnersReferencing
+
+	@numLearnersReferencing.setter
+	def numLearnersReferencing(self, value):
+		self._numLearnersReferencing = value
+		if self.roots is not None:
+			if value == 0:
+				self.roots[self] = None
+			else:
+				self.roots.pop(self, None)
+
+	"""
+	The root team set is left out, it is the trainer's (see Trainer.__setstate__)
+	and would pull every root team along with an agent sent to a worker.
+	"""
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		state['roots'] = None
+		return state
+
+	def __setstate__(self, state):
+		if 'numLearnersReferencing' in state: # older pickles
+			state['_numLearnersReferencing'] = state.pop('numLearnersReferencing')
+		state.setdefault('roots', None)
+		self.__dict__.update(state)
+
+	"""
+	Returns an action to use based on the current state. visited holds the teams
+	already passed through for this state, a new set for each decision (see
+	Agent.act), so that the graph is followed the same way by every agent.
+	"""
+	def act(self, state, sharedMem, visited):
 		visited.add(self) # track visited teams
 		try:
 			topLearner = max([lrnr for lrnr in self.learners
@@ -34,9 +71,11 @@ class Team:
 
 	"""
 	Same as act, but with additional features. Use act for performance.
+	stateIdx is the index of state in the dataset, saved by the learners that
+	bid for the mutation uniqueness test.
 	TODO: IMPLEMENT OTHER GET ACTION IN LEARNER TO MAKE THIS USEFUL.
 	"""
-	def act2(self, state, sharedMem, visited=set(), numStates=50):
+	def act2(self, state, sharedMem, stateIdx, visited):
 		visited.add(self) # track visited teams
 
 		# first get candidate (unvisited) learners
@@ -44,11 +83,11 @@ class Team:
 				if lrnr.action not in visited]
 		# break down getting bids to do more stuff to learners
 		topLearner = learners[0]
-		topBid = learners[0].bid(state)
-		learners[0].saveState(state, numStates=numStates)
+		topBid = learners[0].bid(state, sharedMem)
+		learners[0].saveState(stateIdx)
 		for lrnr in learners[1:]:
 			bid = lrnr.bid(state, sharedMem)
-			lrnr.saveState(state, numStates=numStates)
+			lrnr.saveState(stateIdx)
 			if bid > topBid:
 				topLearner = lrnr
 				topBid = bid
@@ -102,7 +141,7 @@ class Team:
 				pMutProg, pMutAct, pActAtom, atomics, allTeams,
 				pDelInst, pAddInst, pSwpInst, pMutInst,
 				multiActs, pSwapMultiAct, pChangeMultiAct,
-				uniqueProgThresh, shrRegs, inputs=None, outputs=None):
+				uniqueProgThresh, archive=None):
 
 		# delete some learners
 		p = pDelLrn
@@ -110,7 +149,7 @@ class Team:
 			p *= pDelLrn # decrease next chance
 
 			# choose non-atomic learners if only one atomic remaining
-			learner = random.choice([l for l in self.learners
+			learner = stream.choice([l for l in self.learners
 									 if not l.isActionAtomic()
 										or self.numAtomicActions() > 1])
 			self.removeLearner(learner)
@@ -120,7 +159,7 @@ class Team:
 		while flip(p):
 			p *= pAddLrn # decrease next chance
 
-			learner = random.choice([l for l in allLearners
+			learner = stream.choice([l for l in allLearners
 									 if l not in self.learners and
 										l.action is not self])
 			self.addLearner(learner)
@@ -141,5 +180,5 @@ class Team:
 						pMutProg, pMutAct, pActAtom0, atomics, self, allTeams,
 						pDelInst, pAddInst, pSwpInst, pMutInst,
 						multiActs, pSwapMultiAct, pChangeMultiAct,
-						uniqueProgThresh, shrRegs, inputs=inputs, outputs=outputs)
+						uniqueProgThresh, archive=archive)
 				self.addLearner(newLearner)
@@ -0,0 +1,704 @@
+from tpg.program import Program
+from tpg.learner import Learner
+from tpg.team import Team
+from tpg.agent import Agent
+from tpg.rng import stream
+from tpg.utils import allPairs, paretoFronts, packCases, casesByTeam, lexicaseSelect, \
+	teamsByCase, sharedFitness, topIndices
+from contextlib import nullcontext
+import numpy as np
+import pickle
+
+"""
+Functionality for actually growing TPG and evolving it to be functional.
+"""
+class Trainer:
+
+	"""
+	Create a trainer to store the various evolutionary parameters, and runs under
+	them.
+
+	Important parameters:
+
+	actions: List of actions, typically just set as 'range(n)' (n=18 for Atari).
+
+	teamPopSize: Initial number of teams / root teams, to be maintained through
+	evolution.
+
+	rootBasedPop: Whether population size is based on root teams. If true there
+	are always roughly the same amount of root teams (uses more RAM).
+	Else it ensures the total team population size is 'teamPopSize' (uses
+	less RAM).
+
+	sharedMemory: Whether to use the shared memory module to have more long term
+	memory. Only used by version 1, later versions always have it.
+
+	sourceRange, sourceDims: Size and shape of the observations.
+
+	version: Which version of TPG programs to run, see tpg.backends.
+	"""
+	def __init__(self, actions, teamPopSize=360, rootBasedPop=True, sharedMemory=False,
+		gap=0.5, uniqueProgThresh=0, initMaxTeamSize=5, initMaxProgSize=128, registerSize=8,
+		pDelLrn=0.7, pAddLrn=0.7, pMutLrn=0.3, pMutProg=0.66, pMutAct=0.33,
+		pActAtom=0.5, pDelInst=0.5, pAddInst=0.5, pSwpInst=1.0, pMutInst=1.0,
+		pSwapMultiAct=0.66, pChangeMultiAct=0.40, doElites=True,
+		sourceRange=784, sourceDims=(28,28), matrixSize=4, version=1):
+
+		# store all necessary params
+		self.actions = actions
+		self.multiAction = isinstance(self.actions, int)
+
+		self.teamPopSize = teamPopSize
+		self.rootBasedPop = rootBasedPop
+		self.gap = gap # portion of root teams to remove each generation
+		# threshold to accept mutated programs
+		self.uniqueProgThresh = uniqueProgThresh # about 1e-5 is good
+
+		self.pDelLrn = pDelLrn
+		self.pAddLrn = pAddLrn
+		self.pMutLrn = pMutLrn
+		self.pMutProg = pMutProg
+		self.pMutAct = pMutAct
+		self.pActAtom = pActAtom
+		self.pDelInst = pDelInst
+		self.pAddInst = pAddInst
+		self.pSwpInst = pSwpInst
+		self.pMutInst = pMutInst
+		self.pSwapMultiAct = pSwapMultiAct
+		self.pChangeMultiAct = pChangeMultiAct
+		self.doElites = doElites
+
+		self.teams = []
+		self.rootTeams = []
+		self.rootSet = {} # teams no learner references, kept up to date by the teams
+		self.newTeams = [] # teams made since the last nextEpoch
+		self.learners = []
+
+		self.elites = [] # save best at each task
+
+		# agents reused by getAgents, and their shared registers
+		self.agentPool = []
+		self.memoryArena = None
+
+		self.generation = 0
+
+		Program.version = version
+
+		# extra operations if memory
+		if version == 1 and not sharedMemory:
+			Program.operationRange = 6
+		else:
+			Program.operationRange = 8
+
+		Program.destinationRange = registerSize
+		Program.sourceRange = sourceRange
+		Program.sourceDims = sourceDims
+		Program.matrixSize = matrixSize
+		Learner.SourceDimensions = np.asarray(sourceDims)
+
+		# Precompute the bits needed for X and Y coordinates in vector and matrix programs
+		bitsNeeded = len(format(sourceRange,'b'))
+		Program.xShift = int(bitsNeeded/2.0)
+		Program.yMask = (2**(bitsNeeded - Program.xShift)) - 1
+
+		self.initializePopulations(initMaxTeamSize, initMaxProgSize, registerSize)
+
+	"""
+	Initializes a popoulation of teams and learners generated randomly with only
+	atomic actions. The programs of every learner are drawn at once, see
+	Program.randomPrograms.
+	"""
+	def initializePopulations(self, initMaxTeamSize, initMaxProgSize, registerSize):
+		# actions of the learners of each team
+		teamActions = []
+		for _ in range(self.teamPopSize):
+			# 2 unique actions, then more learners
+			if self.multiAction == False:
+				actions = [self.actions[i] for i in stream.pair(len(self.actions))]
+			else:
+				actions = [[stream.random() for _ in range(self.actions)]
+					for _ in range(2)]
+			moreLearners = stream.randint(0, initMaxTeamSize-2)
+			for _ in range(moreLearners):
+				if self.multiAction == False:
+					actions.append(stream.choice(self.actions))
+				else:
+					actions.append([stream.random() for _ in range(self.actions)])
+			teamActions.append(actions)
+
+		programs = iter(Program.randomPrograms(sum(len(actions) for actions in teamActions),
+			maxProgramLength=initMaxProgSize))
+		for actions in teamActions:
+			team = Team()
+			for act in actions:
+				learner = Learner(program=next(programs), action=act,
+								  numRegisters=registerSize)
+				team.addLearner(learner)
+				self.learners.append(learner)
+
+			# save to team populations
+			self.addTeam(team)
+			self.rootTeams.append(team)
+
+	"""
+	Gets rootTeams/agents. Sorts decending by sortTasks, and skips individuals
+	who don't have scores for all skipTasks. If topK is given only the best topK
+	are made into agents, by sortTasks or else the fitness from the last evolve.
+	The agents are pooled, the next call rebinds them to its teams.
+	"""
+	def getAgents(self, sortTasks=[], multiTaskType='min', skipTasks=[], topK=None):
+		# remove those that get skipped
+		rTeams = [team for team in self.rootTeams
+				if len(skipTasks) == 0
+						or any(task not in team.outcomes for task in skipTasks)]
+
+		if len(sortTasks) == 0 and topK is None: # just get all
+			return self.bindAgents(rTeams)
+
+		if len(sortTasks) > 0:
+			# apply scores/fitness to root teams
+			self.scoreIndividuals(sortTasks, multiTaskType=multiTaskType,
+																doElites=False)
+		# return teams sorted by fitness
+		return self.bindAgents([rTeams[i] for i in self.rankTeams(rTeams, topK).tolist()])
+
+	"""
+	Agents for the teams (numbered in order) from the pool, which only grows when
+	there are more teams than ever before. Their shared registers are slots of
+	one memoryArena, which grows with it. Agents left over let go of their teams,
+	which may since have been deleted.
+	"""
+	def bindAgents(self, teams):
+		if len(teams) > len(self.agentPool):
+			size = max(len(teams), 2*len(self.agentPool))
+			self.memoryArena = Agent.memoryArena(size)
+			for i in range(size):
+				memory = None if self.memoryArena is None else self.memoryArena[i]
+				if i < len(self.agentPool):
+					self.agentPool[i].sharedMemory = memory
+				else:
+					self.agentPool.append(Agent(None, num=i, sharedMemory=memory))
+
+		for i, team in enumerate(teams):
+			self.agentPool[i].bind(team, i)
+		for agent in self.agentPool[len(teams):]:
+			agent.team = None
+		return self.agentPool[:len(teams)]
+
+	"""
+	Indices of the best topK (all if None) of the teams by fitness, best first
+	and ties in the teams' order like a stable sort. Only the topK are sorted
+	(see utils.topIndices), teams without a fitness come last.
+	"""
+	@staticmethod
+	def rankTeams(teams, topK=None):
+		fitness = np.array([-np.inf if tm.fitness is None else tm.fitness
+			for tm in teams], dtype=np.float64)
+		best = topIndices(fitness, len(teams) if topK is None else topK)
+		return best[np.argsort(-fitness[best], kind='stable')]
+
+	"""
+	Apply saved scores from list to the agents. Each score is (team id, {task:
+	outcome}), optionally followed by {task: per-case boolean results}.
+	"""
+	def applyScores(self, scores): # used when multiprocessing
+		for score in scores:
+			for rt in self.rootTeams:
+				if score[0] == rt.id:
+					for task, outcome in score[1].items():
+						rt.outcomes[task] = outcome
+					if len(score) > 2:
+						for task, cases in score[2].items():
+							rt.caseOutcomes[task] = packCases(cases)
+					break # on to next score
+
+		return self.rootTeams
+
+	"""
+	Sets the outcomes of the agents at all the tasks at once from an (agents x
+	tasks) matrix, e.g. the per-class accuracies from one pass over a batch.
+	cases optionally gives {task: (agents x cases) boolean matrix} of per-case
+	results, like Agent.reward.
+	"""
+	def applyOutcomes(self, agents, tasks, outcomes, cases=None):
+		for agent, row in zip(agents, np.asarray(outcomes).tolist()):
+			agent.team.outcomes.update(zip(tasks, row))
+
+		if cases is not None:
+			for task, taskCases in cases.items():
+				taskCases = np.asarray(taskCases, dtype=bool)
+				packed = np.packbits(taskCases, axis=1, bitorder='little')
+				for agent, bits in zip(agents, packed):
+					agent.team.caseOutcomes[task] = (taskCases.shape[1], bits)
+
+	"""
+	Evolve the populations for improvements. stateData is the dataset the
+	learners' saved states index (see Agent.act2), needed for uniqueProgThresh.
+	"""
+	def evolve(self, tasks=['task'], multiTaskType='min', timer=None, stateData=None):
+		# timer.phase(name) times each step if given (see timing.PhaseTimer)
+		phase = timer.phase if timer is not None else lambda name: nullcontext()
+		with phase('score'):
+			self.scoreIndividuals(tasks, multiTaskType=multiTaskType,
+					doElites=self.doElites) # assign scores to individuals
+			self.saveFitnessStats() # save fitness stats
+		with phase('select'):
+			self.select() # select individuals to keep
+		with phase('generate'):
+			self.generate(stateData) # create new individuals from those kept
+		with phase('nextEpoch'):
+			self.nextEpoch() # set up for next generation
+
+	"""
+	Assigns a fitness to each agent based on performance at the tasks. Assigns
+	fitness values, or just returns sorted root teams.
+	"""
+	def scoreIndividuals(self, tasks, multiTaskType='min', doElites=True):
+		outcomes = self.getOutcomesMatrix(tasks)
+
+		# handle generation of new elites, typically just done in evolution
+		if doElites:
+			# get the best agent at each task (first best, like max)
+			self.elites = [self.rootTeams[i] for i in np.argmax(outcomes, axis=0)]
+
+		if multiTaskType == 'lexicaseStatic': # also on the cases of a single task
+			self.lexicaseStaticScorer(tasks, outcomes=outcomes)
+		elif multiTaskType == 'lexicaseDynamic':
+			self.lexicaseDynamicScorer(tasks, outcomes=outcomes)
+		elif multiTaskType == 'fitnessSharing':
+			self.fitnessSharingScorer(tasks, outcomes=outcomes)
+		elif len(tasks) == 1: # single fitness
+			for team in self.rootTeams:
+				team.fitness = team.outcomes[tasks[0]]
+		else: # multi fitness
+			# assign fitness to each agent based on tasks and score type
+			if 'pareto' not in multiTaskType:
+				self.simpleScorer(tasks, multiTaskType=multiTaskType, outcomes=outcomes)
+			elif multiTaskType == 'paretoDominate':
+				self.paretoDominateScorer(tasks, outcomes=outcomes)
+			elif multiTaskType == 'paretoNonDominated':
+				self.paretoNonDominatedScorer(tasks, outcomes=outcomes)
+			elif multiTaskType == 'paretoFront':
+				self.paretoFrontScorer(tasks, outcomes=outcomes)
+
+	"""
+	Outcomes of the root teams as a (teams x tasks) matrix, in rootTeams order.
+	"""
+	def getOutcomesMatrix(self, tasks):
+		outcomes = np.empty((len(self.rootTeams), len(tasks)), dtype=np.float64)
+		for i, rt in enumerate(self.rootTeams):
+			outcomes[i] = [rt.outcomes[task] for task in tasks]
+
+		return outcomes
+
+	"""
+	Gets either the min, max, or average score from each individual for ranking.
+	"""
+	def simpleScorer(self, tasks, multiTaskType='min', outcomes=None):
+		if outcomes is None:
+			outcomes = self.getOutcomesMatrix(tasks)
+
+		# normalize each task to [0,1] by its min and max
+		mins = outcomes.min(axis=0)
+		ranges = outcomes.max(axis=0) - mins
+		ranges[ranges == 0] = 1 # everyone tied, everyone gets 0
+		scores = (outcomes - mins) / ranges
+
+		# assign fitness
+		if multiTaskType == 'min':
+			fitnesses = scores.min(axis=1)
+		elif multiTaskType == 'max':
+			fitnesses = scores.max(axis=1)
+		elif multiTaskType == 'average':
+			fitnesses = scores.mean(axis=1)
+		else:
+			return
+
+		for rt, fitness in zip(self.rootTeams, fitnesses.tolist()):
+			rt.fitness = fitness
+
+	"""
+	Rank agents based on how many other agents it dominates
+	"""
+	def paretoDominateScorer(self, tasks, outcomes=None):
+		if outcomes is None:
+			outcomes = self.getOutcomesMatrix(tasks)
+
+		# t1 >= t2 on all tasks, minus comparing to self
+		counts = allPairs(outcomes, np.greater_equal).sum(axis=1) - 1
+		for rt, count in zip(self.rootTeams, counts.tolist()):
+			rt.fitness = count
+
+	"""
+	Rank agents based on how many other agents don't dominate it
+	"""
+	def paretoNonDominatedScorer(self, tasks, outcomes=None):
+		if outcomes is None:
+			outcomes = self.getOutcomesMatrix(tasks)
+
+		# t1 < t2 on all tasks (never true for self)
+		counts = allPairs(outcomes, np.less).sum(axis=1)
+		for rt, count in zip(self.rootTeams, counts.tolist()):
+			rt.fitness = -count
+
+	"""
+	Rank agents by their pareto front (fast non-dominated sort), the first front
+	gets fitness 0, the next -1 and so on.
+	"""
+	def paretoFrontScorer(self, tasks, outcomes=None):
+		if outcomes is None:
+			outcomes = self.getOutcomesMatrix(tasks)
+
+		fronts = paretoFronts(outcomes)
+		for rt, front in zip(self.rootTeams, fronts.tolist()):
+			rt.fitness = -front
+
+	"""
+	Lexicase selection with one random case order shared by every selection
+	event, only the final tie breaks differ.
+	"""
+	def lexicaseStaticScorer(self, tasks, outcomes=None):
+		self.lexicaseScorer(tasks, dynamic=False, outcomes=outcomes)
+
+	"""
+	Lexicase selection with a new random case order for each selection event.
+	"""
+	def lexicaseDynamicScorer(self, tasks, outcomes=None):
+		self.lexicaseScorer(tasks, dynamic=True, outcomes=outcomes)
+
+	"""
+	Runs one lexicase selection event per root team and sets each team's fitness
+	to the number of events that selected it. The cases are the per-case results
+	saved with the outcomes (e.g. correctness on each training sample, see
+	Agent.reward) of the tasks if every root team has them, else the tasks
+	themselves.
+	"""
+	def lexicaseScorer(self, tasks, dynamic=True, outcomes=None):
+		numTeams = len(self.rootTeams)
+		caseBits = self.getCasesMatrix(tasks)
+		if caseBits is not None:
+			numCases = len(caseBits)
+			if dynamic:
+				orders = np.argsort(stream.uniforms((numTeams, numCases)), axis=1)
+			else:
+				orders = stream.permutation(numCases)[None, :]
+			selected = lexicaseSelect(caseBits, orders, stream.uniforms(numTeams), numTeams)
+		else:
+			# few numeric cases, filter down to the best on each in turn
+			if outcomes is None:
+				outcomes = self.getOutcomesMatrix(tasks)
+			order = stream.permutation(len(tasks))
+			selected = np.empty(numTeams, dtype=np.int64)
+			for e in range(numTeams):
+				if dynamic:
+					order = stream.permutation(len(tasks))
+				candidates = np.arange(numTeams)
+				for task in order:
+					scores = outcomes[candidates, task]
+					candidates = candidates[scores == scores.max()]
+					if len(candidates) == 1:
+						break
+				selected[e] = candidates[stream.randint(0, len(candidates)-1)]
+
+		counts = np.bincount(selected, minlength=numTeams)
+		for rt, count in zip(self.rootTeams, counts.tolist()):
+			rt.fitness = count
+
+	"""
+	Fitness sharing, rewards solving the cases few other root teams solve. Uses
+	the per-case results saved with the outcomes (see Agent.reward) if every root
+	team has them, see utils.sharedFitness. Otherwise implicit sharing on the
+	tasks, each team gets its share of the total outcome at each task.
+	"""
+	def fitnessSharingScorer(self, tasks, outcomes=None):
+		teamBits = self.getTeamCasesMatrix(tasks)
+		if teamBits is not None:
+			fitnesses = sharedFitness(teamBits)
+		else:
+			if outcomes is None:
+				outcomes = self.getOutcomesMatrix(tasks)
+			totals = outcomes.sum(axis=0)
+			totals[totals == 0] = 1
+			fitnesses = (outcomes / totals).sum(axis=1)
+
+		for rt, fitness in zip(self.rootTeams, fitnesses.tolist()):
+			rt.fitness = fitness
+
+	"""
+	The per-case results of the root teams on the tasks as a bit packed (teams x
+	words) matrix, see utils.teamsByCase. None unless every root team has them.
+	"""
+	def getTeamCasesMatrix(self, tasks):
+		packed = []
+		for task in tasks:
+			if any(task not in rt.caseOutcomes for rt in self.rootTeams):
+				return None
+			taskCases = [rt.caseOutcomes[task] for rt in self.rootTeams]
+			if any(n != taskCases[0][0] for n, _ in taskCases):
+				return None
+			packed.append(teamsByCase([bits for _, bits in taskCases]))
+
+		if len(packed) == 0 or len(self.rootTeams) == 0:
+			return None
+		return np.concatenate(packed, axis=1)
+
+	"""
+	The per-case results of the root teams on the tasks as a bit packed (cases x
+	teams) matrix, see utils.casesByTeam. None unless every root team has them.
+	"""
+	def getCasesMatrix(self, tasks):
+		packed = []
+		numCases = 0
+		for task in tasks:
+			if any(task not in rt.caseOutcomes for rt in self.rootTeams):
+				return None
+			taskCases = [rt.caseOutcomes[task] for rt in self.rootTeams]
+			if any(n != taskCases[0][0] for n, _ in taskCases):
+				return None
+			packed.append(casesByTeam([bits for _, bits in taskCases], taskCases[0][0]))
+			numCases += taskCases[0][0]
+
+		if numCases == 0:
+			return None
+		return np.concatenate(packed)
+
+	"""
+	Save some stats on the fitness.
+	"""
+	def saveFitnessStats(self):
+		fitnesses = []
+		for rt in self.rootTeams:
+			fitnesses.append(rt.fitness)
+
+		self.fitnessStats = {}
+		self.fitnessStats['fitnesses'] = fitnesses
+		self.fitnessStats['min'] = min(fitnesses)
+		self.fitnessStats['max'] = max(fitnesses)
+		self.fitnessStats['average'] = sum(fitnesses)/len(fitnesses)
+
+	"""
+	Gets stats on some task.
+	"""
+	def getTaskStats(self, task):
+		scores = []
+		for rt in self.rootTeams:
+			scores.append(rt.outcomes[task])
+
+		scoreStats = {}
+		scoreStats['scores'] = scores
+		scoreStats['min'] = min(scores)
+		scoreStats['max'] = max(scores)
+		scoreStats['average'] = sum(scores)/len(scores)
+
+		return scoreStats
+
+	"""
+	Delete a portion of the population according to gap size.
+	"""
+	def select(self):
+		# the worst numDelete teams, ties deleting the later ones (kept by a
+		# stable sort best first), and only those get sorted, best first
+		fitness = np.array([rt.fitness for rt in self.rootTeams], dtype=np.float64)
+		numDelete = int(len(self.rootTeams)*self.gap)
+		worst = np.sort(len(fitness) - 1 - topIndices(-fitness[::-1], numDelete))
+		worst = worst[np.argsort(-fitness[worst], kind='stable')]
+		deleteTeams = [self.rootTeams[i] for i in worst.tolist()]
+
+		# delete the team unless it is an elite (best at some task at-least)
+		# don't delete elites because they may not be root, nor former elites
+		# that learners started referencing while they were kept
+		elites = set(self.elites)
+		deleted = set()
+		deletedLearners = set()
+		for team in [t for t in deleteTeams
+				if t not in elites and t.numLearnersReferencing == 0]:
+			for learner in team.learners:
+				# delete learner from population if this is last team referencing
+				if learner.numTeamsReferencing == 1:
+					# remove reference to team if applicable
+					if not learner.isActionAtomic():
+						learner.action.numLearnersReferencing -= 1
+
+					deletedLearners.add(learner) # permanently remove
+
+			# remove learners from team and delete team from populations
+			team.removeLearners()
+			self.rootSet.pop(team, None)
+			team.roots = None
+			deleted.add(team)
+
+		self.learners = [lrnr for lrnr in self.learners if lrnr not in deletedLearners]
+		self.teams = [team for team in self.teams if team not in deleted]
+		self.rootTeams = [team for team in self.rootTeams if team not in deleted]
+
+	"""
+	Generates new rootTeams based on existing teams.
+	"""
+	def generate(self, stateData=None):
+
+		oLearners = list(self.learners)
+		oTeams = list(self.teams)
+
+		# multiActs for action pool for multiaction mutation
+		if self.multiAction:
+			multiActs = []
+			for learner in oLearners:
+				if learner.isActionAtomic():
+					multiActs.append(list(learner.action))
+		else:
+			multiActs = None
+
+		# behaviour of the learners for the mutation uniqueness test, built once
+		# for every child
+		if self.uniqueProgThresh > 0 and stateData is not None:
+			archive = self.getLearnersArchive(oLearners, stateData)
+		else:
+			archive = None
+
+		while (len(self.teams) < self.teamPopSize or
+				(self.rootBasedPop and len(self.rootSet) < self.teamPopSize)):
+
+			# get parent root team, and child to be based on that
+			parent = stream.choice(self.rootTeams)
+			child = Team()
+
+			# child starts just like parent
+			for learner in parent.learners:
+				child.addLearner(learner)
+
+			# then mutates
+
+			child.mutate(self.pDelLrn, self.pAddLrn, self.pMutLrn, oLearners,
+						self.pMutProg, self.pMutAct, self.pActAtom,
+						self.actions, oTeams,
+						self.pDelInst, self.pAddInst, self.pSwpInst, self.pMutInst,
+						multiActs, self.pSwapMultiAct, self.pChangeMultiAct,
+						self.uniqueProgThresh, archive=archive)
+
+			self.addTeam(child)
+			self.rootTeams.append(child)
+
+	"""
+	Finalize populations and prepare for next generation/epoch.
+	"""
+	def nextEpoch(self):
+		# add in newly added learners, only the new teams can have any
+		known = set(self.learners)
+		for team in self.newTeams:
+			for learner in team.learners:
+				if learner not in known:
+					known.add(learner)
+					self.learners.append(learner)
+		self.newTeams = []
+
+		# root teams, and elites which may not be root
+		self.rootTeams = list(self.rootSet)
+		self.rootTeams.extend(team for team in dict.fromkeys(self.elites)
+				if team not in self.rootSet)
+
+		self.generation += 1
+
+	"""
+	Get the number of root teams currently residing in the teams population.
+	"""
+	def countRootTeams(self):
+		return len(self.rootSet)
+
+	"""
+	Adds a team to the population, it joins the root team set while no learner
+	references it.
+	"""
+	def addTeam(self, team):
+		self.teams.append(team)
+		self.newTeams.append(team)
+		team.roots = self.rootSet
+		if team.numLearnersReferencing == 0:
+			self.rootSet[team] = None
+
+	"""
+	The agent pool is not saved, it is made again by getAgents.
+	"""
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		state.pop('agentPool', None)
+		state.pop('memoryArena', None)
+		return state
+
+	"""
+	Older pickles have no root team set, it is rebuilt from the teams. Otherwise
+	the teams are pointed back at it (see Team.__getstate__).
+	"""
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.agentPool = []
+		self.memoryArena = None
+		if 'rootSet' not in state:
+			self.rootSet = {}
+			for team in self.rootTeams + self.teams:
+				if team.numLearnersReferencing == 0:
+					self.rootSet[team] = None
+			self.newTeams = []
+		for team in self.teams:
+			team.roots = self.rootSet
+
+	"""
+	The behaviour of the learners on the states they saved, for the mutation
+	uniqueness test (see Program.mutate). The learners save indices into
+	stateData, the dataset given to evolve. Returns (states, stateIdx, outputs):
+	states are the distinct saved states, outputs a (learners x states per
+	learner) matrix of each learner's output on its states, padded with NaN,
+	and stateIdx which of states each one is.
+	"""
+	def getLearnersArchive(self, learners, stateData, clearStates=True):
+		saved = [lrnr.savedStates() for lrnr in learners]
+		numStates = max([len(idxs) for idxs in saved], default=0)
+		uniqueIdxs = np.unique(np.concatenate(saved)) if len(saved) > 0 else np.empty(0, dtype=np.int32)
+		stateIdx = np.zeros((len(learners), numStates), dtype=np.int64)
+		outputs = np.full((len(learners), numStates), np.nan)
+		for i, (lrnr, idxs) in enumerate(zip(learners, saved)):
+			stateIdx[i, :len(idxs)] = np.searchsorted(uniqueIdxs, idxs)
+			for j, idx in enumerate(idxs):
+				outputs[i, j] = lrnr.output(stateData[idx])
+
+			if clearStates: # start saving again for the next generation
+				lrnr.clearStates()
+
+		return [stateData[idx] for idx in uniqueIdxs], stateIdx, outputs
+
+	"""
+	Save the trainer to the file, saving any class values to the instance.
+	"""
+	def saveToFile(self, fileName):
+		self.teamIdCount = Team.idCount
+		self.learnerIdCount = Learner.idCount
+		self.programIdCount = Program.idCount
+		self.version = Program.version
+		self.sourceDims = Program.sourceDims
+		self.matrixSize = Program.matrixSize
+		self.xShift = Program.xShift
+		self.yMask = Program.yMask
+		self.operationRange = Program.operationRange
+		self.destinationRange = Program.destinationRange
+		self.sourceRange = Program.sourceRange
+
+		pickle.dump(self, open(fileName, 'wb'))
+
+"""
+Load some trainer from the file, returning it and repopulate class values.
+"""
+def loadTrainer(fileName):
+	trainer = pickle.load(open(fileName, 'rb'))
+
+	Team.idCount = trainer.teamIdCount
+	Learner.idCount = trainer.learnerIdCount
+	Program.idCount = trainer.programIdCount
+	Program.version = getattr(trainer, 'version', Program.version)
+	Program.sourceDims = getattr(trainer, 'sourceDims', Program.sourceDims)
+	Program.matrixSize = getattr(trainer, 'matrixSize', Program.matrixSize)
+	Program.xShift = getattr(trainer, 'xShift', Program.xShift)
+	Program.yMask = getattr(trainer, 'yMask', Program.yMask)
+	Program.operationRange = trainer.operationRange
+	Program.destinationRange = trainer.destinationRange
+	Program.sourceRange = trainer.sourceRange
+
+	return trainer
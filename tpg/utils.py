@@ -0,0 +1,260 @@
+import math
+
+from numba import njit
+import numpy as np
+
+from tpg.rng import stream
+
+"""
+Various useful functions for use within TPG, and for using TPG.
+"""
+
+"""
+Coin flips, at varying levels of success based on prob. Served by the stream
+of random numbers of this process, see tpg.rng.
+"""
+flip = stream.flip
+
+def sign(number):
+	return -1 if number < 0 else 1
+
+# From https://stackoverflow.com/questions/38170188/generate-a-n-dimensional-array-of-coordinates-in-numpy
+def ndim_grid(start,stop):
+    # Set number of dimensions
+    ndims = len(start)
+
+    # List of ranges across all dimensions
+    L = [np.arange(start[i],stop[i]) for i in range(ndims)]
+
+    # Finally use meshgrid to form all combinations corresponding to all 
+    # dimensions and stack them as M x ndims array
+    return np.hstack((np.meshgrid(*L))).swapaxes(0,1).reshape(ndims,-1).T
+
+@njit
+def pad_array(A, length):
+	arr = np.zeros(length)
+	arr[:len(A)] = A
+	return arr
+
+"""
+Register value cleanup, NaN becomes 0 and infinities the largest finite values.
+Each value cleaned up is counted in clamps[0] (see Program.clamps).
+"""
+@njit
+def clamp(value, clamps):
+	if math.isnan(value):
+		clamps[0] += 1
+		return 0.0
+	elif value == math.inf:
+		clamps[0] += 1
+		return np.finfo(np.float64).max
+	elif value == -math.inf:
+		clamps[0] += 1
+		return np.finfo(np.float64).min
+	return value
+
+"""
+x / y with numpy's results for y == 0 (signed infinity, or NaN for 0 / 0)
+instead of raising.
+"""
+@njit
+def divide(x, y):
+	if y != 0:
+		return x / y
+	elif x == 0 or math.isnan(x):
+		return math.nan
+	return math.copysign(math.inf, x) * math.copysign(1.0, y)
+
+"""
+Euclidean norm of x, or of x - y if subtract, without making the difference
+vector. Scaled by the largest element like BLAS nrm2 so big values don't
+overflow when squared.
+"""
+@njit
+def norm(x, y, subtract):
+	scale = 0.0
+	for k in range(len(x)):
+		value = x[k] - y[k] if subtract else x[k]
+		scale = max(scale, abs(value))
+	if scale == 0 or math.isinf(scale) or math.isnan(scale):
+		return scale
+
+	total = 0.0
+	for k in range(len(x)):
+		value = (x[k] - y[k] if subtract else x[k]) / scale
+		total += value * value
+	return scale * math.sqrt(total)
+
+"""
+Returns an (n x n) boolean matrix where [i,j] is True if compare(a[i], a[j]) holds
+on every column of the (n x k) matrix a. Accumulated one column at a time so the
+intermediate is never bigger than the (n x n) result.
+"""
+def allPairs(a, compare):
+	n = len(a)
+	result = np.ones((n, n), dtype=bool)
+	for col in range(a.shape[1]):
+		result &= compare(a[:, col, None], a[None, :, col])
+
+	return result
+
+"""
+Indices (ascending) of the k largest values, ties going to the earlier indices
+like a stable sort. Only the k-th largest is looked for (np.argpartition), the
+values are never sorted.
+"""
+def topIndices(values, k):
+	n = len(values)
+	if k >= n:
+		return np.arange(n)
+	if k <= 0:
+		return np.empty(0, dtype=np.int64)
+	threshold = values[np.argpartition(values, n-k)[n-k]]
+	above = np.flatnonzero(values > threshold)
+	ties = np.flatnonzero(values == threshold)[:k-len(above)]
+	return np.sort(np.concatenate((above, ties)))
+
+"""
+Fast non-dominated sort (maximizing every column of the (n x k) matrix a).
+Returns the pareto front index of each row, 0 being the non-dominated front.
+"""
+def paretoFronts(a):
+	# i dominates j: >= on all columns and > on at least one
+	dominates = allPairs(a, np.greater_equal) & ~allPairs(a, np.less_equal)
+	dominatedCount = dominates.sum(axis=0)
+
+	fronts = np.full(len(a), -1, dtype=np.int64)
+	current = np.flatnonzero(dominatedCount == 0)
+	front = 0
+	while len(current) > 0:
+		fronts[current] = front
+		dominatedCount -= dominates[current].sum(axis=0)
+		dominatedCount[current] = -1 # never picked again
+		current = np.flatnonzero(dominatedCount == 0)
+		front += 1
+
+	return fronts
+
+"""
+Packs a boolean per-case (e.g. per-sample correctness) vector into bytes, returns
+(number of cases, packed bits) as stored in Team.caseOutcomes.
+"""
+def packCases(cases):
+	cases = np.asarray(cases, dtype=bool)
+	return len(cases), np.packbits(cases, bitorder='little')
+
+"""
+Turns the packed case vectors of n teams into a (cases x words) uint64 matrix
+where bit i of word w of a case row is set if team 64*w+i solved that case.
+"""
+def casesByTeam(packedCases, numCases):
+	correct = np.unpackbits(np.array(packedCases), axis=1, count=numCases, bitorder='little')
+	byTeam = np.packbits(correct.T, axis=1, bitorder='little')
+	# pad every row to whole 64 bit words
+	padded = np.zeros((numCases, -(-byTeam.shape[1] // 8) * 8), dtype=np.uint8)
+	padded[:, :byTeam.shape[1]] = byTeam
+	return padded.view(np.uint64)
+
+"""
+Stacks the packed case vectors of n teams into an (n x words) uint64 matrix,
+bit i of word w of row t is set if team t solved case 64*w+i.
+"""
+def teamsByCase(packedCases):
+	packed = np.array(packedCases, dtype=np.uint8)
+	padded = np.zeros((len(packed), -(-packed.shape[1] // 8) * 8), dtype=np.uint8)
+	padded[:, :packed.shape[1]] = packed
+	return padded.view(np.uint64)
+
+"""
+Explicit fitness sharing on the (teams x words) bit matrix of solved cases. The
+niche count of team i is the sum over all teams j of the fraction of i's solved
+cases that j solved too (popcount(i & j) / popcount(i), so at least 1), and its
+shared fitness is the number of cases it solved divided by its niche count.
+Teams that solved nothing get 0.
+"""
+@njit
+def sharedFitness(teamBits):
+	numTeams, numWords = teamBits.shape
+	solved = np.zeros(numTeams)
+	for i in range(numTeams):
+		for w in range(numWords):
+			solved[i] += popcount64(teamBits[i, w])
+
+	overlap = solved.copy() # with itself
+	for i in range(numTeams):
+		if solved[i] == 0:
+			continue
+		for j in range(i+1, numTeams):
+			if solved[j] == 0:
+				continue
+			common = 0
+			for w in range(numWords):
+				common += popcount64(teamBits[i, w] & teamBits[j, w])
+			overlap[i] += common
+			overlap[j] += common
+
+	fitness = np.zeros(numTeams)
+	for i in range(numTeams):
+		if solved[i] > 0:
+			fitness[i] = solved[i] * solved[i] / overlap[i]
+	return fitness
+
+"""
+Number of set bits in a 64 bit word.
+"""
+@njit
+def popcount64(x):
+	x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+	x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+	x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+	return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+"""
+Runs one lexicase selection event per row of tieBreaks on the bit packed
+(cases x words) correctness matrix caseBits of numTeams teams. Event e filters
+the candidates case by case in the order orders[e % len(orders)], keeping only
+the candidates that solved the case unless none did, 64 teams per AND. Ties left
+at the end are broken by tieBreaks[e] in [0,1). Returns the selected team index
+of each event.
+"""
+@njit
+def lexicaseSelect(caseBits, orders, tieBreaks, numTeams):
+	numWords = caseBits.shape[1]
+	allTeams = np.zeros(numWords, dtype=np.uint64)
+	for t in range(numTeams):
+		allTeams[t >> 6] |= np.uint64(1) << np.uint64(t & 63)
+
+	candidates = np.empty(numWords, dtype=np.uint64)
+	filtered = np.empty(numWords, dtype=np.uint64)
+	selected = np.empty(len(tieBreaks), dtype=np.int64)
+	for e in range(len(tieBreaks)):
+		candidates[:] = allTeams
+		numCandidates = numTeams
+		order = orders[e % len(orders)]
+		for c in order:
+			count = 0
+			for w in range(numWords):
+				filtered[w] = candidates[w] & caseBits[c, w]
+				count += popcount64(filtered[w])
+			if count > 0: # drop the candidates that failed this case
+				candidates[:] = filtered
+				numCandidates = count
+				if count == 1:
+					break
+
+		# pick the k'th remaining candidate
+		k = int(tieBreaks[e] * numCandidates)
+		for w in range(numWords):
+			count = popcount64(candidates[w])
+			if k < count:
+				word = candidates[w]
+				for bit in range(64):
+					if (word >> np.uint64(bit)) & np.uint64(1):
+						if k == 0:
+							selected[e] = w*64 + bit
+							break
+						k -= 1
+				break
+			k -= count
+
+	return selected